@@ -16,10 +16,15 @@ from dotenv import load_dotenv
 from langchain_tavily import TavilySearch
 
 # ---------- Import Required Tools ----------
-from crop_management_tools.crop_calendar.crop_calendar_tool import get_crop_calendar, get_crops_by_month
+from crop_management_tools.crop_calendar.crop_calendar_tool import get_crop_calendar, get_crops_by_month, query_crop_calendar
 from crop_management_tools.crop_cultivation_guide.crop_cultivation_tools import *
+from crop_management_tools.crop_cultivation_guide.crop_search import search_crop_guides
+from crop_management_tools.crop_cultivation_guide.retriever_tool import retrieve_crop_cultivation_info
 from open_meteo_weather_tool.weather_tool import get_weather, query_weather_variables
+from open_meteo_weather_tool.agro_indicators import get_agro_weather_summary
 from crop_price_tool.commodity_daily_price_tool import get_crop_price_tool
+from crop_price_tool.price_trend_tool import get_price_trend_tool
+from crop_price_tool.nearest_mandi_price_tool import get_nearest_mandi_prices_tool
 
 load_dotenv()
 
@@ -122,29 +127,38 @@ async def initialize_user(coords: Coords):
 def create_weather_agent():
     return create_react_agent(
         model=llm,
-        tools=[get_weather, query_weather_variables],
+        tools=[get_weather, query_weather_variables, get_agro_weather_summary],
         name="weather_expert",
         prompt="""
         You are a weather forecasting expert specialized in agricultural insights.
 
-        You have access to two tools:
+        You have access to three tools:
         IMP: USE EACH TOOL ONLY ONCE!
 
-        1. `get_weather(city_name: str)`
+        1. `get_weather(city_name: str, step_hours: int = 3)`
            - Takes the name of an Indian city as input.
            - Fetches important weather variables from the local `.cache` (if available and fresh),
              or calls the Open-Meteo API to retrieve new data, then stores it in `.cache`.
            - Provides **3-hourly weather forecasts for the next 3 days**, tailored for agricultural needs.
+             Use step_hours=24 for a daily summary (rain totals, max/min temperature), or 1 / 6.
            - Variables include: temperature, humidity, soil temperature, precipitation, soil moisture, wind speed.
 
-        2. `query_weather_variables(city_name: str, variable: str)`
-           - Fetches a **single weather variable with timestamps** for a given city.
-           - Useful when the user only asks about one factor.
+        2. `query_weather_variables(city_name: str, variables: list[str], step_hours: int = 3, start: str = None, end: str = None, next_hours: int = None)`
+           - Fetches **only the requested weather variables with timestamps** for a given city.
+           - Can be limited to a time window: `next_hours` (e.g. 12) or local `start` / `end` ("2025-08-18 06:00").
+           - Useful when the user only asks about one or a few factors or a specific time.
+
+        3. `get_agro_weather_summary(city_name: str, base_temperature: float = 10.0)`
+           - Returns a small per-day summary computed from the forecast: max/min temperature,
+             growing degree days, rain, evapotranspiration, water deficit (irrigation need),
+             spray windows (low wind, no rain), heat-stress hours and frost risk.
+           - Prefer this for irrigation, spraying, heat or frost questions.
 
         Guidelines:
         - Always use these tools to get data instead of guessing.
         - Use `get_weather` when the user wants the **full forecast**.
-        - Use `query_weather_variables` when the user wants **only one specific variable**.
+        - Use `query_weather_variables` when the user wants **only specific variables** or a specific time window.
+        - Use `get_agro_weather_summary` when the user wants farming advice (irrigate? spray? heat/frost?).
         - Summarize results in a farmer-friendly format.
         - If the city name is missing or unclear, politely ask the user to clarify before fetching data.
         """
@@ -153,41 +167,66 @@ def create_weather_agent():
 def create_crop_cultivation_agent():
     return create_react_agent(
         model=llm,
-        tools=[search_filename, get_keys, get_context, get_crop_calendar, get_crops_by_month],
+        tools=[find_crop_guide, get_keys, get_context, search_crop_guides, retrieve_crop_cultivation_info,
+               get_crop_calendar, get_crops_by_month, query_crop_calendar],
         name="crop_agent",
         prompt="""
         You are an agricultural crop cultivation and crop calendar expert.
         You have access to the following tools:
 
         1. Use these tools to find and retrieve information about crop cultivation
-                1. `search_filename(crop_name: str) -> str`
+                1. `find_crop_guide(crop_name: str) -> dict`
                 - Finds the JSON file for a given crop.
-                - If crop name is in another language, check for translations.
-                - Returns filename or None.
+                - Understands English, Hindi (roman or Devanagari) and regional crop names and small typos
+                  (e.g. "ragi", "urad", "gehun", "pyaaz"), so pass the user's word as is.
+                - Returns {"filename", "matched_name", "score", "alternatives"}; filename is None if no guide matches.
 
                 2. `get_keys(filename: str) -> list`
                 - Gets all available section keys for a crop's guide.
 
-                3. `get_context(filename: str, key: str) -> str`
-                - Extracts detailed content under the given section key.
+                3. `get_context(filename: str, key: str, max_chars: int = 1500, cursor: int = None) -> dict`
+                - Extracts the content under the given section key.
+                - Long sections first return a short summary ("is_summary": true). Only if it does not answer
+                  the question, call again with `cursor=next_cursor` to read the full text page by page.
+
+                4. `search_crop_guides(query: str, k: int = 5) -> list`
+                - Full-text search across all sections of all crop guides.
+                - Returns the top hits as {"crop", "filename", "section", "score", "snippet"}.
+                - Use it for questions that are not about one known crop (e.g. "which crops tolerate saline soil",
+                  "how to control stem borer"), then `get_context` on the best hits if more detail is needed.
+
+                5. `retrieve_crop_cultivation_info(query: str, k: int = 3) -> dict`
+                - Semantic search: finds guide passages by meaning, even when the user's words differ from the guide's
+                  (e.g. "my paddy leaves are turning yellow").
+                - Returns {"context": [{"title", "source", "chunk", "score", "content"}]}.
 
         2. use the following tools to get crop calendar information: (eg: what crops can i grow in this month, what crops are suitable for this season)
 
-                1. `get_crop_calendar(crop_name: str) -> dict`
+                1. `get_crop_calendar(crop_name: str, state: str = None) -> dict`
                 - Returns crop calendar information (planting, sowing, growth, arrival months) for the crop in India.
+                - Pass the user's state to get that state's calendar; the result also names the crop's guide file.
                 - Example output: {"planting": ["June", "July"], "sowing": ["August"], ...}
 
-                2. `get_crops_by_month(month: int) -> dict`
+                2. `get_crops_by_month(month: int, state: str = None) -> dict`
                 - Returns all crops categorized by stage (planting, sowing, growth, arrival) for a given month.
                 - Input: integer (1–12). Example: 7 -> July.
                 - Output includes stage-wise crops for that month.
 
+                3. `query_crop_calendar(start_month=None, end_month=None, season=None, next_months=None, stage=None, state=None) -> dict`
+                - Crops by stage over several months in one call: a month range (e.g. 11 to 2), a season
+                  ("kharif", "rabi", "zaid") or the next N months from today. `stage` optionally limits to
+                  "planting", "sowing", "growth" or "arrival".
+
         Guidelines:
         - First, understand the user's query.
-        - If the user asks about general crop cultivation (e.g., "How to grow rice?"), use `search_filename → get_keys → get_context`.
+        - If the user asks about general crop cultivation (e.g., "How to grow rice?"), use `find_crop_guide → get_keys → get_context`.
+        - If the question spans several crops or names a problem rather than a crop, use `search_crop_guides` first.
+          If it finds nothing useful, or the question is descriptive (symptoms, situations), use `retrieve_crop_cultivation_info`.
         - If the user asks about crop timelines or stages (e.g., "When is wheat planted?" or "Which crops are sown in July?"):
             * Use `get_crop_calendar` when the query mentions a specific crop.
             * Use `get_crops_by_month` when the query mentions a specific month.
+            * Use `query_crop_calendar` for several months, a season or "in the coming months" (one call, not one per month).
+            * Always pass the user's state (from the question or the user location info) to the calendar tools.
         - Always present the information in simple, farmer-friendly language.
         - If the crop name, month, or section is unclear, politely ask the user to clarify.
         """
@@ -214,17 +253,27 @@ def create_policy_agent():
 def create_crop_price_agent():
     return create_react_agent(
         model=llm,
-        tools=[get_crop_price_tool],
+        tools=[get_crop_price_tool, get_price_trend_tool, get_nearest_mandi_prices_tool],
         name="crop_price_agent",
         prompt="""
         You are a farmer's helper. Your job is to find and explain crop prices in the simplest way a farmer could understand.
 
         Guidelines:
         - Always respond in the same language as the user's message.
-        - Extract the state from the user's query. State is always required.
-        - If the user also mentions crop, district, market, variety, or grade, use that too.
+        - Extract the state from the user's query. State is always required for the `Crop Price Tool`.
+        - If the user asks for prices "near me" / at nearby mandis, or gives no state but their coordinates are known,
+          use the `Nearest Mandi Price Tool` with their latitude and longitude; it also tells how far each mandi is.
+        - If the user also mentions crop, district, market, variety, or grade, use that too. Names may be in Hindi or
+          misspelled; the tools map them to the official names. If a tool answers that a name is not in the data or a market is
+          not in that district, use its suggestion or ask the user instead of retrying with guesses.
         - Do not ask for additional information unless absolutely necessary.
         - Use the `Crop Price Tool` to fetch mandi prices.
+        - The tool already computes the numbers: "summary" has the lowest / highest / mean modal price per crop and
+          the cheapest / dearest market, "rows" has min / max / modal price per crop, variety and market (Rs/quintal).
+          Use these numbers as they are; do not recompute them.
+        - For "are prices going up / down?" or "how did prices change?" questions, use the `Price Trend Tool`. Its
+          "overall" block has the week-over-week change in percent, the rolling average and the volatility across
+          markets, and "trend" says whether the price is rising, falling or stable. Quote those numbers as they are.
         - Summarize results in farmer-friendly language, showing lowest, highest, and average price if available.
         - If data is missing or unclear, politely ask the user for clarification.
         """
@@ -281,6 +330,8 @@ workflow = create_supervisor(
     - Specializes in providing mandi prices for crops across India.
     - If the location is not provided by the user then use User location (user city or user state) Info to fetch mandi prices.
     - Uses the Crop Price Tool to fetch prices from government data sources.
+    - Uses the Price Trend Tool for price movement questions (is a crop's price rising or falling, weekly change).
+    - For prices at nearby mandis, pass the user's coordinates (from the message or User location Info) to this agent.
 
     Your role as Supervisor:
     - Listen to the user's query and decide which expert is best suited to respond.
@@ -318,6 +369,8 @@ async def query_ai(request: Query):
         # Pass to workflow
         user_msg = {"role": "user", "content": request.user_prompt}
         if request.coords:
+            # metadata is not shown to the model, so the coordinates also go into the text
+            user_msg["content"] += f"\n\n(User coordinates: lat={request.coords.lat}, lon={request.coords.lon})"
             user_msg["metadata"] = {
                 "lat": request.coords.lat,
                 "lon": request.coords.lon,
@@ -0,0 +1,162 @@
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+# Small in-memory name index shared by the tools that need to resolve
+# user / LLM supplied names (places, crops, mandis) without a network call.
+#
+# Lookup order, cheapest first:
+#   1. exact normalized name         -> score 1.0
+#   2. transliteration-folded name   -> score 0.95  ("Indaur" == "Indore")
+#   3. trigram candidates re-ranked by edit similarity (typos)
+
+
+#---------------------text normalisation---------------------
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents / punctuation and collapse whitespace."""
+    text = unicodedata.normalize("NFKD", str(text)).lower()
+    chars = []
+    for ch in text:
+        if unicodedata.combining(ch) and ord(ch) < 0x0900:
+            continue  # Latin accents; Indic vowel signs are kept
+        chars.append(" " if unicodedata.category(ch)[0] in "PSZ" else ch)
+    return " ".join("".join(chars).split())
+
+
+# Roman spellings of Indian names vary a lot (bhopal / bopal, pyaaz / pyaj).
+# Fold the common variants onto one key; order matters (digraphs first).
+_FOLDS = [
+    ("aa", "a"), ("ee", "i"), ("ii", "i"), ("oo", "u"), ("uu", "u"), ("ou", "u"), ("au", "o"),
+    ("ph", "f"), ("sh", "s"), ("kh", "k"), ("gh", "g"), ("th", "t"), ("dh", "d"),
+    ("bh", "b"), ("jh", "j"), ("ch", "c"), ("w", "v"), ("z", "j"), ("q", "k"),
+    ("y", "i"), ("ck", "k"),
+]
+
+
+def phonetic_key(text: str) -> str:
+    """Transliteration-insensitive key used for the second lookup stage."""
+    key = normalize(text).replace(" ", "")
+    for src, dst in _FOLDS:
+        key = key.replace(src, dst)
+    key = re.sub(r"(.)\1+", r"\1", key)  # collapse doubled letters
+    key = re.sub(r"(?<=[^aeiou])e$", "", key)  # silent final e of English spellings (Indore = Indaur)
+    # other final vowels stay: Shivpur / Shivpuri and Rampur / Rampura are different places
+    return key.replace("e", "i").replace("o", "u")
+
+
+def syllable_count(text: str) -> int:
+    """Vowel groups of the phonetic key (0 for non-Latin scripts)."""
+    return len(re.findall(r"[aiu]+", phonetic_key(text)))
+
+
+def same_shape(query: str, candidate: str) -> bool:
+    """
+    True if a fuzzy candidate could be a spelling of `query` rather than
+    another name: same first sound and the same number of syllables
+    (Chandpur is not a misspelling of Chandrapur).
+    """
+    q, c = phonetic_key(query), phonetic_key(candidate)
+    if not q or not c:
+        return False
+    return q[0] == c[0] and syllable_count(query) == syllable_count(candidate)
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+#---------------------index---------------------
+
+class FuzzyIndex:
+    """
+    Name -> value index with exact, transliteration and fuzzy lookups.
+
+    Several names (aliases) may point at the same value. Safe to extend
+    from several threads while it is being queried.
+    """
+
+    def __init__(self, max_candidates: int = 8):
+        self.max_candidates = max_candidates
+        self._names = []
+        self._values = []
+        self._exact = {}
+        self._phonetic = {}
+        self._grams = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._names)
+
+    def add(self, name: str, value):
+        """Register `name` as an alias of `value` (first registration wins)."""
+        norm = normalize(name)
+        if not norm:
+            return
+        with self._lock:
+            if norm in self._exact:
+                return
+            idx = len(self._names)
+            self._names.append(norm)
+            self._values.append(value)
+            self._exact[norm] = idx
+            self._phonetic.setdefault(phonetic_key(norm), idx)
+            for gram in trigrams(norm):
+                self._grams[gram].add(idx)
+
+    def get(self, name: str):
+        """Exact (normalized) lookup, or None."""
+        idx = self._exact.get(normalize(name))
+        return None if idx is None else self._values[idx]
+
+    def search(self, query: str, limit: int = 5, cutoff: float = 0.6) -> list:
+        """
+        Return up to `limit` matches as (value, matched_name, score) tuples,
+        best first. Scores are in [0, 1]; matches below `cutoff` are dropped.
+        """
+        norm = normalize(query)
+        if not norm:
+            return []
+
+        idx = self._exact.get(norm)
+        if idx is not None:
+            return [(self._values[idx], self._names[idx], 1.0)]
+
+        results = {}
+        key = phonetic_key(norm)
+        idx = self._phonetic.get(key) if len(key) >= 4 else None
+        if idx is not None:
+            results[idx] = 0.95
+
+        # Rank by shared trigrams, then re-score the short list exactly.
+        counts = defaultdict(int)
+        for gram in trigrams(norm):
+            for cand in self._grams.get(gram, ()):
+                counts[cand] += 1
+        candidates = sorted(counts, key=counts.get, reverse=True)[:self.max_candidates]
+        for cand in candidates:
+            score = SequenceMatcher(None, norm, self._names[cand]).ratio()
+            if score > results.get(cand, 0.0):
+                results[cand] = score
+
+        ranked = sorted(results.items(), key=lambda item: item[1], reverse=True)
+        matches, seen = [], []
+        for cand, score in ranked:
+            if score < cutoff:
+                break
+            value = self._values[cand]
+            if any(value is v or value == v for v in seen):
+                continue
+            seen.append(value)
+            matches.append((value, self._names[cand], round(score, 3)))
+            if len(matches) == limit:
+                break
+        return matches
+
+    def best(self, query: str, cutoff: float = 0.6):
+        """Best (value, matched_name, score) or None."""
+        matches = self.search(query, limit=1, cutoff=cutoff)
+        return matches[0] if matches else None
@@ -0,0 +1,172 @@
+import os
+import json
+import threading
+from common.fuzzy_index import FuzzyIndex
+
+# Region-aware crop calendar, loaded once from data/crop_calendar_india.json.
+#
+# The file has an all-India calendar per crop, overrides per agro-climatic
+# zone and per state (null = crop not commonly grown there), and the guide
+# file of every crop. At load time every state is resolved into its own
+# CropCalendarIndex, so a lookup by the user's state is a dict access.
+# Crop groups name the seasonal entries of one crop ("rice" -> paddy kharif
+# and paddy rabi), so a plain name reaches every season grown in a state.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CALENDAR_FILE = os.path.join(BASE_DIR, "data", "crop_calendar_india.json")
+CALENDAR_SCHEMA = 1
+
+STAGES = ("planting", "sowing", "growth", "arrival")
+
+# Region name used for the all-India calendar.
+NATIONAL = "India"
+
+
+#---------------------month bitmasks---------------------
+# A set of months is a 12-bit mask (bit m-1 = month m), so "which crops are
+# sown between November and February" is one AND per (crop, stage) instead
+# of scanning month lists.
+
+def months_to_mask(months) -> int:
+    mask = 0
+    for m in months:
+        mask |= 1 << (m - 1)
+    return mask
+
+
+def mask_to_months(mask: int) -> list:
+    return [m for m in range(1, 13) if mask >> (m - 1) & 1]
+
+
+def range_mask(start: int, end: int) -> int:
+    """Months start..end inclusive, wrapping over the new year (11..2 = Nov, Dec, Jan, Feb)."""
+    if start <= end:
+        return months_to_mask(range(start, end + 1))
+    return months_to_mask(list(range(start, 13)) + list(range(1, end + 1)))
+
+
+def ordered_months(start: int, mask: int) -> list:
+    """Months of `mask` in calendar order starting at `start` (so Nov, Dec, Jan, not Jan, Nov, Dec)."""
+    return [m for m in [(start - 1 + i) % 12 + 1 for i in range(12)] if mask >> (m - 1) & 1]
+
+
+def first_month(mask: int):
+    """Month that opens the (first) run of `mask`, reading circularly (Nov for Nov-Feb), or None."""
+    for m in range(1, 13):
+        previous = 12 if m == 1 else m - 1
+        if mask >> (m - 1) & 1 and not mask >> (previous - 1) & 1:
+            return m
+    return 1 if mask else None
+
+
+class CropCalendarIndex:
+    """(crop, stage) -> month mask, and month -> stage -> crops, built once from a calendar dict."""
+
+    def __init__(self, calendar: dict):
+        self.masks = {crop: {stage: months_to_mask(stages.get(stage, [])) for stage in STAGES}
+                      for crop, stages in calendar.items()}
+        self.by_month = {m: {stage: tuple(crop for crop, masks in self.masks.items() if masks[stage] >> (m - 1) & 1)
+                             for stage in STAGES}
+                         for m in range(1, 13)}
+
+    def crops_in(self, mask: int, stages=STAGES) -> dict:
+        """{stage: {crop: mask of that stage's months inside `mask`}} for every overlapping crop."""
+        result = {}
+        for stage in stages:
+            result[stage] = {crop: masks[stage] & mask for crop, masks in self.masks.items() if masks[stage] & mask}
+        return result
+
+
+#---------------------regional calendar---------------------
+
+class RegionalCropCalendar:
+    """Per-state calendar indexes plus crop / state name resolution."""
+
+    def __init__(self, path: str = CALENDAR_FILE):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("schema") != CALENDAR_SCHEMA:
+            raise ValueError(f"Unsupported crop calendar schema {data.get('schema')} in '{path}'.")
+        self.version = data["version"]
+
+        crops = data["crops"]
+        self.guides = {crop: info.get("guide") for crop, info in crops.items()}
+        self.groups = {group: info["crops"] for group, info in data.get("crop_groups", {}).items()}
+        for group, members in self.groups.items():
+            self.guides[group] = self.guides[members[0]]
+        national = {crop: info["calendar"] for crop, info in crops.items() if info.get("calendar")}
+
+        # state -> zone, and the resolved calendar of every state
+        self.zones = {}
+        self.indexes = {NATIONAL: CropCalendarIndex(national)}
+        for zone, zone_info in data["zones"].items():
+            for state in zone_info["states"]:
+                self.zones[state] = zone
+                calendar = dict(national)
+                calendar.update(zone_info.get("calendar", {}))
+                calendar.update(data.get("states", {}).get(state, {}).get("calendar", {}))
+                self.indexes[state] = CropCalendarIndex({c: s for c, s in calendar.items() if s})
+
+        self._states = FuzzyIndex()
+        for state in self.zones:
+            self._states.add(state, state)
+        for alias, state in data.get("state_aliases", {}).items():
+            self._states.add(alias, state)
+
+        self._crops = FuzzyIndex()
+        for crop, info in list(crops.items()) + list(data.get("crop_groups", {}).items()):
+            self._crops.add(crop, crop)
+            for name in info.get("names", []):
+                self._crops.add(name, crop)
+
+    def state(self, name: str):
+        """Canonical state name for a state name / abbreviation / small typo, or None."""
+        if not name:
+            return None
+        match = self._states.best(name, cutoff=0.85)
+        return match[0] if match else None
+
+    def index(self, state: str = None):
+        """(region, CropCalendarIndex) for a state; the all-India calendar if the state is unknown."""
+        region = self.state(state) if state else None
+        return (region, self.indexes[region]) if region else (NATIONAL, self.indexes[NATIONAL])
+
+    def state_note(self, state: str = None):
+        """Why the all-India calendar is used for a given but unrecognized state, else None."""
+        if state and self.state(state) is None:
+            return f"State '{state}' is not in the crop calendar; showing the all-India calendar."
+        return None
+
+    def members(self, crop: str) -> list:
+        """Calendar crops of a crop group ("paddy" -> paddy kharif, paddy rabi), else [crop]."""
+        return self.groups.get(crop, [crop])
+
+    def crop(self, name: str):
+        """Calendar crop (or crop group) name for a crop name / local name, or None."""
+        if not name:
+            return None
+        match = self._crops.best(name, cutoff=0.8)
+        if match:
+            return match[0]
+        # last resort: the guide the name resolves to, if exactly one calendar crop uses it
+        from crop_management_tools.crop_cultivation_guide.crop_name_index import crop_name_index
+        guides = crop_name_index.resolve(name, limit=1)
+        if guides:
+            matches = [c for c, g in self.guides.items() if g == guides[0]["filename"]]
+            if len(matches) == 1:
+                return matches[0]
+        return None
+
+
+_calendar = None
+_calendar_lock = threading.Lock()
+
+
+def get_regional_calendar() -> RegionalCropCalendar:
+    """Process-wide regional crop calendar (loaded on first use)."""
+    global _calendar
+    if _calendar is None:
+        with _calendar_lock:
+            if _calendar is None:
+                _calendar = RegionalCropCalendar()
+    return _calendar
@@ -1,177 +1,178 @@
-from collections import defaultdict
-
-crop_calendar_india_data = {
-    "castor seed": {
-        "planting": [7], 
-        "sowing": [7], 
-        "growth": [8, 9, 10], 
-        "arrival": [11, 12, 1]
-    },
-    "mustard seed": {
-        "planting": [10], 
-        "sowing": [10], 
-        "growth": [11, 12, 1], 
-        "arrival": [2, 3]
-    },
-    "soybean": {
-        "planting": [6], 
-        "sowing": [6], 
-        "growth": [7, 8, 9], 
-        "arrival": [10, 11]
-    },
-    "cotton": {
-        "planting": [5], 
-        "sowing": [5], 
-        "growth": [6, 7, 8, 9], 
-        "arrival": [10, 11, 12]
-    },
-    "guar": {
-        "planting": [7], 
-        "sowing": [7], 
-        "growth": [8, 9], 
-        "arrival": [10]
-    },
-    "barley": {
-        "planting": [10], 
-        "sowing": [10], 
-        "growth": [11, 12, 1], 
-        "arrival": [2, 3]
-    },
-    "maize": {
-        "planting": [6], 
-        "sowing": [6], 
-        "growth": [7, 8, 9], 
-        "arrival": [10]
-    },
-    "wheat": {
-        "planting": [11], 
-        "sowing": [11], 
-        "growth": [12, 1, 2], 
-        "arrival": [3, 4]
-    },
-    "chana": {
-        "planting": [10], 
-        "sowing": [10], 
-        "growth": [11, 12, 1], 
-        "arrival": [2, 3]
-    },
-    "bajra": {
-        "planting": [6], 
-        "sowing": [6], 
-        "growth": [7, 8], 
-        "arrival": [9]
-    },
-    "paddy kharif": {
-        "planting": [6], 
-        "sowing": [6], 
-        "growth": [7, 8, 9], 
-        "arrival": [10, 11]
-    },
-    "paddy rabi": {
-        "planting": [11], 
-        "sowing": [11], 
-        "growth": [12, 1, 2], 
-        "arrival": [3, 4]
-    },
-    "moong": {
-        "planting": [6], 
-        "sowing": [6], 
-        "growth": [7, 8], 
-        "arrival": [9]
-    },
-    "sugar": {
-        "planting": [2], 
-        "sowing": [2], 
-        "growth": [3, 4, 5, 6, 7, 8, 9], 
-        "arrival": [10, 11, 12, 1]
-    },
-    "coriander": {
-        "planting": [10], 
-        "sowing": [10], 
-        "growth": [11, 12, 1], 
-        "arrival": [2, 3]
-    },
-    "jeera": {
-        "planting": [11], 
-        "sowing": [11], 
-        "growth": [12, 1, 2], 
-        "arrival": [3, 4]
-    },
-    "turmeric": {
-        "planting": [4], 
-        "sowing": [4], 
-        "growth": [5, 6, 7, 8, 9], 
-        "arrival": [10, 11, 12, 1, 2, 3]
-    },
-    "chilli": {
-        "planting": [8], 
-        "sowing": [8], 
-        "growth": [9, 10, 11], 
-        "arrival": [12, 1, 2]
-    }
-}
+from datetime import datetime
+from crop_management_tools.crop_calendar.calendar_index import (
+    STAGES, first_month, get_regional_calendar, ordered_months, range_mask,
+)
 
 month_names = {
     1: "January", 2: "February", 3: "March", 4: "April", 5: "May", 6: "June",
     7: "July", 8: "August", 9: "September", 10: "October", 11: "November", 12: "December"
 }
 
+# Season -> (first month, last month) of the season in India.
+SEASONS = {
+    "kharif": (6, 10),   # monsoon crops, sown June-July
+    "rabi": (10, 3),     # winter crops, sown October-December
+    "zaid": (3, 6),      # summer crops between rabi harvest and kharif sowing
+}
+
+
+# Region-aware calendar (calendar_index.py), loaded and indexed at startup.
+regional_calendar = get_regional_calendar()
+
+
+def _month_number(month):
+    """1-12 from an int or a month name / 3-letter abbreviation, else None."""
+    if isinstance(month, int):
+        return month if 1 <= month <= 12 else None
+    if isinstance(month, str):
+        text = month.strip().lower()
+        if text.isdigit():
+            return _month_number(int(text))
+        for number, name in month_names.items():
+            if len(text) >= 3 and name.lower().startswith(text):
+                return number
+    return None
+
 
-def get_crop_calendar(crop_name: str):
+def _stage_months(masks: dict) -> dict:
+    """{stage: month names} in season order from the start of sowing (Dec, Jan, Feb for wheat growth)."""
+    start = first_month(masks["sowing"] or masks["planting"]) or 1
+    return {stage: [month_names[m] for m in ordered_months(start, mask)] or "No information available"
+            for stage, mask in masks.items()}
+
+
+#---------------------tools---------------------
+
+def get_crop_calendar(crop_name: str, state: str = None):
     """
     Returns the crop calendar {planting, sowing, growth, arrival} information for the given crop in India.
     Provides readable month names.
     Includes error handling if crop is not found or has missing stage data.
+
+    Args:
+        crop_name (str): Crop name; local names work too (e.g. "chana", "gram", "soyabean", "tur").
+            "rice" / "paddy" gives every paddy season grown in the region.
+        state (str): Optional Indian state of the user (e.g. "Madhya Pradesh", "MP"). Gives that
+            state's calendar; without it (or for an unknown state) the all-India calendar is used.
+
+    Returns:
+        dict: {"crop", "region", "guide": crop guide filename or None, "calendar_version",
+               "planting": [...], "sowing": [...], "growth": [...], "arrival": [...]}
+        For a crop with several seasons (rice): {..., "seasons": {"paddy kharif": {stage: [...]}, ...}}.
+        "note" explains a fallback to the all-India calendar.
     """
     print("CROP CALENDAR TOOL CALLED!")
     if not crop_name or not isinstance(crop_name, str):
         return {"error": "Invalid input. Please provide a crop name as a string."}
 
-    crop = crop_calendar_india_data.get(crop_name.lower())
-    if not crop:
+    crop = regional_calendar.crop(crop_name)
+    if crop is None:
         return {"error": f"Crop '{crop_name}' not found in the India crop calendar."}
 
-    result = {}
-    for stage, months in crop.items():
-        if not months:
-            result[stage] = "No information available"
-        else:
-            try:
-                result[stage] = [month_names[m] for m in months]
-            except KeyError as e:
-                result[stage] = f"Invalid month index {e.args[0]} in data."
+    region, index = regional_calendar.index(state)
+    notes = [regional_calendar.state_note(state)]
+    seasons = {c: index.masks[c] for c in regional_calendar.members(crop) if c in index.masks}
+    if not seasons:
+        # not grown in this state: say so and give the all-India calendar
+        notes.append(f"'{crop}' is not commonly grown in {region}; showing the all-India calendar.")
+        region, index = regional_calendar.index(None)
+        seasons = {c: index.masks[c] for c in regional_calendar.members(crop) if c in index.masks}
+        if not seasons:
+            return {"error": f"No calendar for '{crop}' in {region}."}
 
+    result = {"crop": crop, "region": region, "guide": regional_calendar.guides.get(crop),
+              "calendar_version": regional_calendar.version}
+    notes = [n for n in notes if n]
+    if notes:
+        result["note"] = " ".join(notes)
+    if crop in seasons:
+        result.update(_stage_months(seasons[crop]))
+    else:
+        # a crop group ("rice"): one calendar per season grown in the region
+        result["seasons"] = {c: _stage_months(masks) for c, masks in seasons.items()}
     return result
 
 
-def get_crops_by_month(month: int):
+def get_crops_by_month(month: int, state: str = None):
     """
     Returns a dictionary of crops categorized by stage (planting, sowing, growth, arrival)
     for a given month in India.
-    Input: month (1–12)
+    Input: month (1–12 or a month name), optional state of the user (e.g. "Punjab")
     Output: {stage: [crops]}
     """
     print("REVERSE CROP CALENDAR TOOL CALLED!")
-    
-    if not isinstance(month, int) or month not in range(1, 13):
+
+    month = _month_number(month)
+    if month is None:
         return {"error": "Invalid input. Please provide a month number between 1 and 12."}
-    
-    stages_by_month = defaultdict(list)
 
-    for crop, stages in crop_calendar_india_data.items():
-        for stage, months in stages.items():
-            if month in months:
-                stages_by_month[stage].append(crop)
-    
-    # Convert defaultdict to normal dict, replace empty with "No crops"
-    result = {}
-    for stage in ["planting", "sowing", "growth", "arrival"]:
-        result[stage] = stages_by_month.get(stage, []) or ["No crops"]
-    
-    return {
+    region, index = regional_calendar.index(state)
+    result = {
         "month": month_names[month],
-        "crops": result
+        "region": region,
+        "crops": {stage: list(crops) or ["No crops"] for stage, crops in index.by_month[month].items()},
     }
+    note = regional_calendar.state_note(state)
+    if note:
+        result["note"] = note
+    return result
+
+
+def query_crop_calendar(start_month=None, end_month=None, season: str = None,
+                        next_months: int = None, stage: str = None, state: str = None):
+    """
+    Crops by stage for a window of months, answered in one call.
+
+    Give exactly one kind of window:
+      - `start_month` (+ optional `end_month`): a month range, wrapping over the
+        new year (e.g. 11 to 2 = November-February). Months are numbers 1-12 or names.
+      - `season`: "kharif" (June-October), "rabi" (October-March) or "zaid" (March-June).
+      - `next_months`: the next N months starting with the current month.
+
+    Args:
+        stage (str): Optional; only "planting", "sowing", "growth" or "arrival".
+        state (str): Optional Indian state of the user; the all-India calendar without it.
+
+    Returns:
+        dict: {"months": [month names of the window], "region": state or "India",
+               "crops": {stage: {crop: [months of that stage inside the window]}}}
+    """
+    print("CROP CALENDAR RANGE TOOL CALLED!")
+
+    if season is not None:
+        bounds = SEASONS.get(str(season).strip().lower())
+        if bounds is None:
+            return {"error": f"Unknown season '{season}'. Use one of: {', '.join(SEASONS)}."}
+        start, end = bounds
+    elif next_months is not None:
+        if not isinstance(next_months, int) or not 1 <= next_months <= 12:
+            return {"error": "next_months must be a number between 1 and 12."}
+        start = datetime.now().month
+        end = (start + next_months - 2) % 12 + 1
+    elif start_month is not None:
+        start = _month_number(start_month)
+        end = _month_number(end_month) if end_month is not None else start
+        if start is None or end is None:
+            return {"error": "Invalid month. Use a number between 1 and 12 or a month name."}
+    else:
+        return {"error": "Give start_month (and end_month), season or next_months."}
+
+    if stage is not None and stage not in STAGES:
+        return {"error": f"Unknown stage '{stage}'. Use one of: {', '.join(STAGES)}."}
+
+    region, index = regional_calendar.index(state)
+    window = range_mask(start, end)
+    crops = index.crops_in(window, STAGES if stage is None else (stage,))
+    result = {
+        "months": [month_names[m] for m in ordered_months(start, window)],
+        "region": region,
+        "crops": {st: {crop: [month_names[m] for m in ordered_months(start, mask)] for crop, mask in by_crop.items()}
+                  for st, by_crop in crops.items()},
+    }
+    note = regional_calendar.state_note(state)
+    if note:
+        result["note"] = note
+    return result
 
 
 
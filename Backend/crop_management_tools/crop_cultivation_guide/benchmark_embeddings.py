@@ -0,0 +1,142 @@
+import sys
+import json
+import time
+import resource
+import argparse
+import subprocess
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from crop_management_tools.crop_cultivation_guide.crop_corpus import get_corpus
+from crop_management_tools.crop_cultivation_guide.crop_name_index import filename_names
+from crop_management_tools.crop_cultivation_guide.retriever_tool import CropRetriever
+
+# Compare the retriever's embedding backends on this machine:
+#
+#   cd Backend && python -m crop_management_tools.crop_cultivation_guide.benchmark_embeddings
+#
+# Every backend runs in its own process so peak RSS is measured cleanly.
+# Queries are "<section> of <crop>" for the guide sections plus a few
+# free-form questions, without repeats. The query caches are emptied before
+# the sequential and the concurrent pass so both measure the model and
+# FAISS; a third pass repeats the queries against the warm caches. Recall@k
+# is the overlap of a backend's FAISS top-k with the reference backend's
+# top-k for the same query.
+
+_QUESTIONS = [
+    "my paddy leaves are turning yellow",
+    "how much fertilizer for wheat per acre",
+    "which crop can be grown in saline soil",
+    "control of pod borer in chana",
+    "when to harvest onion",
+    "irrigation schedule for sugarcane in summer",
+]
+
+
+def benchmark_queries(limit: int) -> list:
+    queries = list(_QUESTIONS)
+    for fname, section, _ in get_corpus().iter_sections():
+        queries.append(f"{section} of {filename_names(fname)[0]}")
+    return list(dict.fromkeys(queries))[:limit]
+
+
+def _percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 2)
+
+
+def _timed_searches(retriever, queries: list, k: int):
+    latencies, top_k = [], []
+    for query in queries:
+        t = time.perf_counter()
+        hits = retriever.search(query, k)
+        latencies.append(time.perf_counter() - t)
+        top_k.append([i for i, _ in hits])
+    return latencies, top_k
+
+
+def _counters(retriever) -> tuple:
+    stats = retriever.cache_stats()
+    return tuple(stats[cache][n] for cache in ("embeddings", "results") for n in ("hits", "misses"))
+
+
+def _hit_rate(before: tuple, after: tuple, cache: int) -> float:
+    hits, misses = (after[2 * cache + i] - before[2 * cache + i] for i in (0, 1))
+    return round(hits / (hits + misses), 3) if hits + misses else 0.0
+
+
+def run_backend(backend: str, queries: list, k: int, threads: int) -> dict:
+    """Latency, throughput, cache hit rates, peak RSS and top-k ids of one backend (run in a fresh process)."""
+    retriever = CropRetriever(backend=backend)
+    start = time.perf_counter()
+    retriever.refresh()
+    retriever.embed("warm up")
+    load_s = time.perf_counter() - start
+
+    cold = _counters(retriever)
+    retriever.clear_caches()
+    latencies, top_k = _timed_searches(retriever, queries, k)
+
+    # concurrent queries, as from several requests at once (micro-batched by the onnx backend)
+    retriever.clear_caches()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(lambda q: retriever.search(q, k), queries))
+    concurrent_s = time.perf_counter() - start
+
+    # the same queries again, answered from the caches
+    warm = _counters(retriever)
+    cached, _ = _timed_searches(retriever, queries, k)
+    end = _counters(retriever)
+
+    return {
+        "backend": backend,
+        "load_s": round(load_s, 2),
+        "p50_ms": _percentile_ms(latencies, 50),
+        "p95_ms": _percentile_ms(latencies, 95),
+        "concurrent_qps": round(len(queries) / concurrent_s, 1),
+        "cached_p50_ms": _percentile_ms(cached, 50),
+        # cold: sequential + concurrent passes (should be 0), warm: the repeated pass
+        "cold_embedding_hit_rate": _hit_rate(cold, warm, 0),
+        "cold_result_hit_rate": _hit_rate(cold, warm, 1),
+        "warm_result_hit_rate": _hit_rate(warm, end, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "top_k": top_k,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the crop retriever's embedding backends.")
+    parser.add_argument("--backends", nargs="+", default=["huggingface", "onnx"],
+                        help="Backends to compare; the first one is the recall reference.")
+    parser.add_argument("--queries", type=int, default=200, help="Number of benchmark queries.")
+    parser.add_argument("-k", type=int, default=5, help="Top-k used for recall.")
+    parser.add_argument("--threads", type=int, default=8, help="Threads for the concurrent run.")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    queries = benchmark_queries(args.queries)
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, queries, args.k, args.threads)))
+        return
+
+    results = []
+    for backend in args.backends:
+        out = subprocess.run(
+            [sys.executable, "-m", __spec__.name, "--worker", backend, "--queries", str(args.queries),
+             "-k", str(args.k), "--threads", str(args.threads)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+
+    reference = results[0]["top_k"]
+    print(f"{len(queries)} queries, k={args.k}, recall against {results[0]['backend']}\n")
+    print(f"{'backend':<12} {'load s':>7} {'p50 ms':>7} {'p95 ms':>7} {'conc q/s':>9} {'cached p50':>11} "
+          f"{'cold emb hit':>13} {'cold res hit':>13} {'warm res hit':>13} {'peak RSS MB':>12} {'recall@k':>9}")
+    for r in results:
+        recall = np.mean([len(set(a) & set(b)) / max(len(b), 1) for a, b in zip(r["top_k"], reference)])
+        print(f"{r['backend']:<12} {r['load_s']:>7} {r['p50_ms']:>7} {r['p95_ms']:>7} "
+              f"{r['concurrent_qps']:>9} {r['cached_p50_ms']:>11} {r['cold_embedding_hit_rate']:>13} "
+              f"{r['cold_result_hit_rate']:>13} {r['warm_result_hit_rate']:>13} {r['peak_rss_mb']:>12} {recall:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
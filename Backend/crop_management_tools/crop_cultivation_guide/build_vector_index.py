@@ -0,0 +1,223 @@
+import os
+import json
+import pickle
+import hashlib
+import argparse
+import numpy as np
+from crop_management_tools.crop_cultivation_guide.crop_corpus import DOCS_PATH, _as_sections, section_text
+from crop_management_tools.crop_cultivation_guide.crop_name_index import filename_names
+from crop_management_tools.crop_cultivation_guide.retriever_tool import (
+    EMBEDDING_BACKEND, EMBEDDING_MODEL, INDEX_DIR, index_ids, load_docstore, make_embeddings,
+)
+
+# Incremental build of the retriever's FAISS index from crop_cultivation_json:
+#
+#   cd Backend && python -m crop_management_tools.crop_cultivation_guide.build_vector_index
+#   cd Backend && python -m crop_management_tools.crop_cultivation_guide.build_vector_index --dry-run
+#
+# Guides are read one file at a time and chunked per section. manifest.json
+# keeps a content hash and the FAISS ids of every section, so a run only
+# embeds sections that are new or changed and drops the vectors of changed
+# or removed ones. It also records the embedding backend and model (the
+# int8 ONNX export by file hash); a different one means a full rebuild. The index is an IndexIDMap2 (stable ids across updates);
+# index.faiss / index.pkl keep LangChain's FAISS layout, are written to temp
+# files and swapped in with os.replace.
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 100
+EMBED_BATCH_SIZE = 64
+
+
+#---------------------chunking---------------------
+
+def chunk_text(text: str, size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP):
+    """Split text into ~`size`-char chunks on line / word boundaries, overlapping by ~`overlap` chars."""
+    words = text.replace("\n", " \n ").split(" ")
+    chunk, length = [], 0
+    for word in words:
+        if length + len(word) > size and chunk:
+            yield " ".join(chunk).replace(" \n ", "\n").strip()
+            tail, tail_len = [], 0
+            while chunk and tail_len + len(chunk[-1]) < overlap:
+                tail_len += len(chunk[-1]) + 1
+                tail.insert(0, chunk.pop())
+            chunk, length = tail, tail_len
+        chunk.append(word)
+        length += len(word) + 1
+    if any(w.strip() for w in chunk):
+        yield " ".join(chunk).replace(" \n ", "\n").strip()
+
+
+def iter_sections(docs_path: str = DOCS_PATH):
+    """Yield (filename, section, text, sha1) one guide file at a time."""
+    for fname in sorted(f for f in os.listdir(docs_path) if f.endswith(".json")):
+        with open(os.path.join(docs_path, fname), "r", encoding="utf-8") as f:
+            sections = _as_sections(json.load(f))
+        for section, value in sections.items():
+            text = section_text(value)
+            yield fname, section, text, hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def section_chunks(fname: str, section: str, text: str):
+    """(text, metadata) of every chunk of one section; the crop and section head every chunk."""
+    crop = filename_names(fname)[0]
+    for i, chunk in enumerate(chunk_text(text)):
+        yield f"{crop} - {section}\n{chunk}", {"source": fname, "title": crop, "section": section, "chunk": i}
+
+
+#---------------------index files---------------------
+
+def _params(backend: str, model_name: str) -> dict:
+    # anything that changes the vectors forces a full rebuild: fp32 and int8
+    # vectors of the same model must not share an index
+    params = {"backend": backend, "model": model_name, "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP}
+    if backend == "onnx":
+        from crop_management_tools.crop_cultivation_guide.onnx_embeddings import model_id
+        params["onnx_model"] = model_id()
+    return params
+
+
+def _load(index_dir: str, backend: str, model_name: str):
+    """(index, {id: text}, {id: metadata}, manifest) of an existing build, or None to start over."""
+    import faiss
+    try:
+        with open(os.path.join(index_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("params") != _params(backend, model_name):
+        return None
+    index = faiss.read_index(os.path.join(index_dir, "index.faiss"))
+    texts, metadatas = load_docstore(os.path.join(index_dir, "index.pkl"))
+    if not hasattr(index, "id_map") or set(index_ids(index).tolist()) != set(texts):
+        return None
+    return index, texts, metadatas, manifest
+
+
+def _write(index_dir: str, index, texts: dict, metadatas: dict, manifest: dict):
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_core.documents import Document
+
+    os.makedirs(index_dir, exist_ok=True)
+    docstore = InMemoryDocstore({str(i): Document(page_content=texts[i], metadata=metadatas[i]) for i in texts})
+    paths = {name: os.path.join(index_dir, name) for name in ("index.pkl", "index.faiss", MANIFEST_FILE)}
+    tmp = {name: f"{path}.tmp-{os.getpid()}" for name, path in paths.items()}
+
+    with open(tmp["index.pkl"], "wb") as f:
+        pickle.dump((docstore, {i: str(i) for i in texts}), f)
+    faiss.write_index(index, tmp["index.faiss"])
+    with open(tmp[MANIFEST_FILE], "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+
+    # docstore first, index second: a reader that sees only the new docstore
+    # finds the id sets differ and keeps its previous index until both are in
+    for name in ("index.pkl", "index.faiss", MANIFEST_FILE):
+        os.replace(tmp[name], paths[name])
+
+
+#---------------------build---------------------
+
+def build_index(index_dir: str = INDEX_DIR, docs_path: str = DOCS_PATH, backend: str = EMBEDDING_BACKEND,
+                model_name: str = EMBEDDING_MODEL, batch_size: int = EMBED_BATCH_SIZE,
+                full: bool = False, dry_run: bool = False) -> dict:
+    """
+    Bring the FAISS index in `index_dir` up to date with the guides in `docs_path`.
+
+    Returns a summary: section counts by status, chunks embedded, vectors in the index.
+    """
+    import faiss
+
+    previous = None if full else _load(index_dir, backend, model_name)
+    if previous is None:
+        index, texts, metadatas = None, {}, {}
+        manifest = {"version": MANIFEST_VERSION, "params": _params(backend, model_name), "next_id": 0, "sections": {}}
+    else:
+        index, texts, metadatas, manifest = previous
+    old_sections = manifest["sections"]
+
+    embeddings = None
+    pending, new_sections = [], {}
+    summary = {"rebuild": previous is None, "unchanged": 0, "changed": 0, "new": 0, "removed": 0, "chunks_embedded": 0}
+
+    def flush():
+        nonlocal index, embeddings
+        if embeddings is None:
+            embeddings = make_embeddings(backend, model_name)
+        vectors = np.asarray(embeddings.embed_documents([t for _, t, _ in pending]), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        if index is None:
+            index = faiss.IndexIDMap2(faiss.IndexFlatL2(vectors.shape[1]))
+        index.add_with_ids(vectors, np.array([i for i, _, _ in pending], dtype=np.int64))
+        for i, text, meta in pending:
+            texts[i], metadatas[i] = text, meta
+        summary["chunks_embedded"] += len(pending)
+        pending.clear()
+
+    stale_ids = []
+    for fname, section, text, digest in iter_sections(docs_path):
+        key = f"{fname}::{section}"
+        old = old_sections.get(key)
+        if old is not None and old["hash"] == digest:
+            new_sections[key] = old
+            summary["unchanged"] += 1
+            continue
+        summary["changed" if old is not None else "new"] += 1
+        if old is not None:
+            stale_ids += old["ids"]
+        ids = []
+        for chunk, meta in section_chunks(fname, section, text):
+            chunk_id = manifest["next_id"]
+            manifest["next_id"] += 1
+            ids.append(chunk_id)
+            if not dry_run:
+                pending.append((chunk_id, chunk, meta))
+                if len(pending) >= batch_size:
+                    flush()
+        new_sections[key] = {"hash": digest, "ids": ids}
+
+    for key, old in old_sections.items():
+        if key not in new_sections:
+            summary["removed"] += 1
+            stale_ids += old["ids"]
+
+    changed = summary["changed"] or summary["new"] or summary["removed"] or previous is None
+    if dry_run or not changed:
+        summary["vectors"] = index.ntotal if index is not None else 0
+        return summary
+
+    if pending:
+        flush()
+    if stale_ids and index is not None:
+        index.remove_ids(np.array(stale_ids, dtype=np.int64))
+        for i in stale_ids:
+            texts.pop(i, None)
+            metadatas.pop(i, None)
+    if index is None:
+        raise ValueError(f"No crop guide sections found in '{docs_path}'.")
+
+    manifest["sections"] = new_sections
+    _write(index_dir, index, texts, metadatas, manifest)
+    summary["vectors"] = index.ntotal
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally (re)build the crop guide FAISS index.")
+    parser.add_argument("--index-dir", default=INDEX_DIR, help="FAISS index directory.")
+    parser.add_argument("--docs", default=DOCS_PATH, help="Folder of crop guide JSON files.")
+    parser.add_argument("--backend", default=EMBEDDING_BACKEND, choices=["huggingface", "onnx"], help="Embedding backend.")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE, help="Chunks per embedding call.")
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest and re-embed everything.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report which sections would be re-embedded.")
+    args = parser.parse_args()
+
+    print(build_index(args.index_dir, args.docs, args.backend, batch_size=args.batch_size,
+                      full=args.full, dry_run=args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
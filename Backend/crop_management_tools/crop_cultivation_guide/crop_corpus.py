@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import threading
+from crop_management_tools.crop_cultivation_guide.text_analysis import extractive_summary, sentences
+
+# In-memory index of the crop cultivation guides: filename -> section -> content.
+#
+# Every JSON file is parsed once (lazily, on first use) and re-parsed only when
+# its mtime changes, so the crop tools are dictionary lookups instead of a
+# listdir + json.load per call. The plain text and an extractive summary of
+# every section are computed at load time too, so paging / summarizing a
+# section in get_context is a slice of a ready string.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DOCS_PATH = os.path.join(BASE_DIR, "crop_cultivation_json")
+
+# How often (seconds) the folder is re-scanned for changed files.
+RELOAD_CHECK_INTERVAL = 5.0
+
+# Length of the precomputed per-section summaries.
+SUMMARY_CHARS = 400
+
+
+def _as_sections(data) -> dict:
+    """Top-level sections of a guide. A few guides are a list of section dicts; merge them."""
+    if isinstance(data, dict):
+        return data
+    sections = {}
+    for part in data if isinstance(data, list) else [data]:
+        if not isinstance(part, dict):
+            continue
+        for key, value in part.items():
+            name, n = key, 2
+            while name in sections:
+                name, n = f"{key} ({n})", n + 1
+            sections[name] = value
+    return sections
+
+
+def section_text(value) -> str:
+    """Flatten a section (str / dict / list, arbitrarily nested) into plain text lines."""
+    if isinstance(value, dict):
+        lines = []
+        for key, item in value.items():
+            text = section_text(item)
+            lines.append(f"{key}: {text}" if "\n" not in text else f"{key}:\n{text}")
+        return "\n".join(lines)
+    if isinstance(value, list):
+        return "\n".join(section_text(item) for item in value)
+    return "" if value is None else str(value)
+
+
+def section_units(value, key: str = None, in_list: bool = False) -> list:
+    """
+    Summary units of a section: whole entries, never a bare label line.
+
+    A list item made of plain fields (one hybrid: name, grain type,
+    features) is one unit; a text value is split into sentences, the first
+    one carrying its key.
+    """
+    if isinstance(value, dict):
+        if in_list and all(not isinstance(v, (dict, list)) for v in value.values()):
+            record = "; ".join(f"{k}: {v}" for k, v in value.items() if v not in (None, ""))
+            return [record] if record else []
+        units = []
+        for k, item in value.items():
+            units.extend(section_units(item, k))
+        return units
+    if isinstance(value, list):
+        units = []
+        for item in value:
+            units.extend(section_units(item, key, in_list=True))
+        return units
+    parts = sentences("" if value is None else str(value))
+    if parts and key and not in_list:
+        parts[0] = f"{key}: {parts[0]}"
+    return parts
+
+
+class CropCorpus:
+    """All crop guides of DOCS_PATH, kept in memory and reloaded on change."""
+
+    def __init__(self, docs_path: str = DOCS_PATH):
+        self.docs_path = docs_path
+        self.docs = {}        # filename -> {section: content}
+        self.texts = {}       # filename -> {section: plain text}
+        self.summaries = {}   # filename -> {section: extractive summary}
+        self.version = 0      # bumped whenever a guide is added, changed or removed
+        self._mtimes = {}
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def _scan(self):
+        with self._lock:
+            current = {}
+            for entry in os.scandir(self.docs_path):
+                if entry.name.endswith(".json") and entry.is_file():
+                    current[entry.name] = entry.stat().st_mtime
+
+            changed = [f for f, m in current.items() if self._mtimes.get(f) != m]
+            removed = [f for f in self._mtimes if f not in current]
+            for fname in changed:
+                with open(os.path.join(self.docs_path, fname), "r", encoding="utf-8") as f:
+                    sections = _as_sections(json.load(f))
+                texts = {key: section_text(value) for key, value in sections.items()}
+                self.texts[fname] = texts
+                self.summaries[fname] = {key: extractive_summary(text, SUMMARY_CHARS, section_units(sections[key]))
+                                         for key, text in texts.items()}
+                self.docs[fname] = sections
+            for fname in removed:
+                for table in (self.docs, self.texts, self.summaries):
+                    table.pop(fname, None)
+
+            if changed or removed:
+                self._mtimes = current
+                self.version += 1
+            self._checked = time.monotonic()
+
+    def refresh(self, force: bool = False):
+        """Reload changed guides (at most every RELOAD_CHECK_INTERVAL seconds unless forced)."""
+        if force or not self._mtimes or time.monotonic() - self._checked > RELOAD_CHECK_INTERVAL:
+            self._scan()
+        return self
+
+    def filenames(self) -> list:
+        return sorted(self.refresh().docs)
+
+    def iter_sections(self):
+        """Yield (filename, section, plain text) for every section of every guide."""
+        for fname, texts in sorted(self.refresh().texts.items()):
+            for key, text in texts.items():
+                yield fname, key, text
+
+    def sections(self, filename: str) -> dict:
+        """{section: content} of one guide; raises FileNotFoundError for unknown files."""
+        docs = self.refresh().docs
+        if filename not in docs:
+            raise FileNotFoundError(f"No crop guide named '{filename}'.")
+        return docs[filename]
+
+    def section(self, filename: str, key: str):
+        """(plain text, summary) of one section, or None if the guide has no such section."""
+        texts = self.refresh().texts
+        if filename not in texts:
+            raise FileNotFoundError(f"No crop guide named '{filename}'.")
+        if key not in texts[filename]:
+            return None
+        return texts[filename][key], self.summaries[filename][key]
+
+
+_corpus = CropCorpus()
+
+
+def get_corpus() -> CropCorpus:
+    """Process-wide crop guide corpus (loaded on first use)."""
+    return _corpus.refresh()
@@ -1,10 +1,14 @@
-import os
-import json
+from crop_management_tools.crop_cultivation_guide.crop_corpus import get_corpus
+from crop_management_tools.crop_cultivation_guide.crop_name_index import crop_name_index
 
-# Base directory where this script is located
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-# Absolute path to the JSON data folder
-DOCS_PATH = os.path.join(BASE_DIR, "crop_cultivation_json")
+# The guides in `crop_cultivation_json` are parsed once into an in-memory
+# index (crop_corpus.py) and re-read only when a file changes.
+
+# get_context budget: sections longer than this come back as their
+# precomputed summary first and are paged on request, so a 7 KB section is
+# not pushed through every later agent / supervisor LLM call.
+DEFAULT_CONTEXT_CHARS = 1500
+CHARS_PER_TOKEN = 4   # rough average for English text
 
 
 def search_filename(crop_name: str) -> str:
@@ -12,20 +16,39 @@ def search_filename(crop_name: str) -> str:
     Search for the JSON filename corresponding to a given crop name.
 
     Args:
-        crop_name (str): The name of the crop (case-insensitive).
+        crop_name (str): The name of the crop (case-insensitive). English, Hindi
+            (e.g. "gehun", "गेहूं") and regional names as well as small typos work.
     
     Returns:
         str: The filename of the crop JSON file if found, otherwise None.
 
     Notes:
-        - Looks inside the `crop_cultivation_json` folder located relative to this script.
-        - Assumes filenames follow the convention `<crop_name>.json` (lowercase).
+        - Looks up the crop alias index built from the `crop_cultivation_json` folder
+          and `crop_aliases.json`.
     """
     print("SEARCHING FILE!")
-    for fname in os.listdir(DOCS_PATH):
-        if fname.startswith(crop_name.lower()) and fname.endswith(".json"):
-            return fname
-    return None
+    matches = crop_name_index.resolve(crop_name, limit=1)
+    return matches[0]["filename"] if matches else None
+
+
+def find_crop_guide(crop_name: str) -> dict:
+    """
+    Find the crop guide for a crop name in any language, with a match score.
+
+    Args:
+        crop_name (str): Crop name in English, Hindi (roman or Devanagari) or a
+            regional language, e.g. "ragi", "urad", "soybean", "pyaz", "गेहूं".
+
+    Returns:
+        dict: {"filename": best guide or None, "matched_name": alias that matched,
+               "score": 0..1, "alternatives": other close guides}
+    """
+    print("FINDING CROP GUIDE!")
+    matches = crop_name_index.resolve(crop_name, limit=3)
+    if not matches:
+        return {"filename": None, "matched_name": None, "score": 0.0, "alternatives": []}
+    best = matches[0]
+    return dict(best, alternatives=[m["filename"] for m in matches[1:]])
 
 
 def get_keys(filename: str) -> list:
@@ -39,39 +62,76 @@ def get_keys(filename: str) -> list:
         list: A list of keys available in the JSON file.
 
     Notes:
-        - Opens the file from the `crop_cultivation_json` folder.
+        - Reads the in-memory index of the `crop_cultivation_json` folder.
         - Useful to check what sections (e.g., "Introduction", "Requirements", etc.)
           are available for a crop.
     """
     print("GETTING KEYS!")
-    with open(os.path.join(DOCS_PATH, filename), "r", encoding="utf-8") as f:
-        data = json.load(f)
-        return list(data.keys())
+    return list(get_corpus().sections(filename).keys())
 
 
-def get_context(filename: str, key: str) -> str:
+def _page(text: str, start: int, budget: int):
+    """(page, next cursor or None) of `text` from `start`, cut at a line / word boundary within `budget` chars."""
+    end = start + budget
+    if end >= len(text):
+        return text[start:].strip(), None
+    cut = text.rfind("\n", start, end)
+    if cut <= start:
+        cut = text.rfind(" ", start, end)
+    if cut <= start:
+        cut = end
+    return text[start:cut].strip(), cut + 1 if text[cut].isspace() else cut
+
+
+def get_context(filename: str, key: str, max_chars: int = DEFAULT_CONTEXT_CHARS,
+                cursor: int = None, max_tokens: int = None) -> dict | str:
     """
-    Retrieve the content under a specific key from a crop JSON file.
+    Retrieve the content under a specific key from a crop JSON file, within a size budget.
 
     Args:
         filename (str): The name of the crop JSON file.
         key (str): The section key to fetch content from (e.g., "Soil", "Varieties").
-    
+        max_chars (int): Maximum characters to return (default 1500).
+        cursor (int): Omit on the first call. Pass the returned `next_cursor` to read
+            the full section text page by page.
+        max_tokens (int): Budget in tokens instead of characters (about 4 characters per token).
+
     Returns:
-        str: The text content under the given key, or "Key not found" if the key does not exist.
+        dict: {"filename", "key",
+               "content": section text, its summary, or one page of it,
+               "is_summary": True if `content` is the section summary,
+               "next_cursor": cursor of the next page, or None when nothing is left,
+               "total_chars": length of the full section text}
+        or "Key not found" if the key does not exist.
 
     Notes:
-        - Opens the file from the `crop_cultivation_json` folder.
-        - Supports direct key lookup only (nested structures require extension).
+        - Short sections are returned whole. Longer ones return a precomputed
+          extractive summary first; read on with `cursor=0` only if the summary
+          does not answer the question.
     """
-    with open(os.path.join(DOCS_PATH, filename), "r", encoding="utf-8") as f:
-        print("GET CONTEXT TOOL UTILIZED!")
-        data = json.load(f)
-        return data.get(key, "Key not found")
-    
-
-
-
+    print("GET CONTEXT TOOL UTILIZED!")
+    section = get_corpus().section(filename, key)
+    if section is None:
+        return "Key not found"
+    text, summary = section
+    budget = max(1, max_tokens * CHARS_PER_TOKEN if max_tokens else max_chars)
+
+    if cursor is None:
+        if len(text) <= budget:
+            content, is_summary, next_cursor = text, False, None
+        else:
+            content, is_summary, next_cursor = _page(summary, 0, budget)[0], True, 0
+    else:
+        (content, next_cursor), is_summary = _page(text, max(0, int(cursor)), budget), False
+
+    return {
+        "filename": filename,
+        "key": key,
+        "content": content,
+        "is_summary": is_summary,
+        "next_cursor": next_cursor,
+        "total_chars": len(text),
+    }
 
 
 # if __name__ == "__main__":
@@ -0,0 +1,64 @@
+import os
+import re
+import json
+import threading
+from common.fuzzy_index import FuzzyIndex
+from crop_management_tools.crop_cultivation_guide.crop_corpus import BASE_DIR, get_corpus
+
+# Crop name -> guide filename, across English, Hindi (roman + Devanagari)
+# and regional names. Built from the guide filenames plus crop_aliases.json
+# and rebuilt whenever the corpus changes.
+
+ALIASES_FILE = os.path.join(BASE_DIR, "crop_aliases.json")
+
+# Fuzzy matches below this score are reported as "not found".
+MATCH_CUTOFF = 0.75
+
+
+def filename_names(filename: str) -> list:
+    """Names implied by a guide filename: 'fingermillet(ragi).json' -> ['fingermillet', 'ragi']."""
+    stem = filename[:-len(".json")] if filename.endswith(".json") else filename
+    stem = re.sub(r"_info$", "", stem)
+    names = [re.sub(r"\(.*?\)", "", stem)]
+    names += re.findall(r"\((.*?)\)", stem)
+    return [n.replace("_", " ").strip() for n in names if n.strip()]
+
+
+class CropNameIndex:
+    """Fuzzy alias index over the crop guides."""
+
+    def __init__(self):
+        self._index = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _build(self, corpus):
+        with open(ALIASES_FILE, "r", encoding="utf-8") as f:
+            aliases = json.load(f)
+        index = FuzzyIndex()
+        filenames = corpus.filenames()
+        for fname in filenames:
+            for name in filename_names(fname):
+                index.add(name, fname)
+        for fname, names in aliases.items():
+            if fname in filenames:
+                for name in names:
+                    index.add(name, fname)
+        return index
+
+    def index(self) -> FuzzyIndex:
+        corpus = get_corpus()
+        if self._index is None or self._version != corpus.version:
+            with self._lock:
+                if self._index is None or self._version != corpus.version:
+                    self._index = self._build(corpus)
+                    self._version = corpus.version
+        return self._index
+
+    def resolve(self, crop_name: str, limit: int = 3, cutoff: float = MATCH_CUTOFF) -> list:
+        """Best matching guides as [{filename, matched_name, score}], best first."""
+        return [{"filename": fname, "matched_name": name, "score": score}
+                for fname, name, score in self.index().search(crop_name, limit=limit, cutoff=cutoff)]
+
+
+crop_name_index = CropNameIndex()
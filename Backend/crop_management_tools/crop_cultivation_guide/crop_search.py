@@ -0,0 +1,111 @@
+import threading
+import numpy as np
+from collections import Counter, defaultdict
+from crop_management_tools.crop_cultivation_guide.crop_corpus import get_corpus
+from crop_management_tools.crop_cultivation_guide.crop_name_index import filename_names
+from crop_management_tools.crop_cultivation_guide.text_analysis import sentences, tokenize
+
+# BM25 full-text index over every section of every crop guide, so questions
+# that span crops ("which crops tolerate saline soil") are one lookup instead
+# of a find -> keys -> context walk per crop. Rebuilt when the corpus changes.
+
+K1 = 1.5
+B = 0.75
+SNIPPET_CHARS = 300
+
+class CropSearchIndex:
+    """BM25 index with one document per (guide, section)."""
+
+    def __init__(self):
+        self.docs = []          # (filename, section, text)
+        self.postings = {}      # term -> (doc ids, BM25 weights)
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _build(self, corpus):
+        docs, lengths, term_docs = [], [], defaultdict(list)
+        for fname, section, text in corpus.iter_sections():
+            crop = " ".join(filename_names(fname))
+            # section titles and crop names count twice: they say what the text is about
+            tokens = tokenize(f"{crop} {section} {crop} {section} {text}")
+            doc_id = len(docs)
+            docs.append((fname, section, text))
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                term_docs[term].append((doc_id, tf))
+
+        lengths = np.asarray(lengths, dtype=np.float32)
+        norm = K1 * (1 - B + B * lengths / max(lengths.mean(), 1.0))
+        n_docs = len(docs)
+        postings = {}
+        for term, items in term_docs.items():
+            ids = np.fromiter((d for d, _ in items), dtype=np.int32, count=len(items))
+            tf = np.fromiter((t for _, t in items), dtype=np.float32, count=len(items))
+            idf = np.log(1 + (n_docs - len(items) + 0.5) / (len(items) + 0.5))
+            postings[term] = (ids, (idf * tf * (K1 + 1) / (tf + norm[ids])).astype(np.float32))
+
+        self.docs, self.postings = docs, postings
+
+    def refresh(self):
+        corpus = get_corpus()
+        if self._version != corpus.version:
+            with self._lock:
+                if self._version != corpus.version:
+                    self._build(corpus)
+                    self._version = corpus.version
+        return self
+
+    def search(self, query: str, k: int = 5) -> list:
+        """Top-k (doc id, score) for a free-text query."""
+        self.refresh()
+        scores = np.zeros(len(self.docs), dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                np.add.at(scores, posting[0], posting[1])
+        hits = np.flatnonzero(scores)
+        if not len(hits):
+            return []
+        top = hits[np.argsort(-scores[hits])[:k]]
+        return [(int(i), float(scores[i])) for i in top]
+
+
+def snippet(text: str, query: str, max_chars: int = SNIPPET_CHARS) -> str:
+    """The sentence / line of `text` sharing most terms with `query`, trimmed to `max_chars`."""
+    terms = set(tokenize(query))
+    pieces = sentences(text)
+    if not pieces:
+        return ""
+    best = max(pieces, key=lambda p: len(terms & set(tokenize(p))))
+    return best if len(best) <= max_chars else best[:max_chars].rsplit(" ", 1)[0] + " ..."
+
+
+crop_search_index = CropSearchIndex()
+
+
+def search_crop_guides(query: str, k: int = 5) -> list:
+    """
+    Full-text search over every section of every crop cultivation guide.
+
+    Args:
+        query (str): Free-text question or keywords, e.g. "saline soil tolerant crops",
+            "stem borer control", "zinc deficiency".
+        k (int): Number of hits to return (default 5).
+
+    Returns:
+        list: Up to k hits, best first, each
+            {"crop": str, "filename": str, "section": str, "score": float, "snippet": str}.
+            Use `get_context(filename, section)` to read a full section.
+    """
+    print("CROP GUIDE SEARCH TOOL CALLED!")
+    hits = []
+    for doc_id, score in crop_search_index.search(query, k):
+        fname, section, text = crop_search_index.docs[doc_id]
+        hits.append({
+            "crop": filename_names(fname)[0],
+            "filename": fname,
+            "section": section,
+            "score": round(score, 2),
+            "snippet": snippet(text, query),
+        })
+    return hits
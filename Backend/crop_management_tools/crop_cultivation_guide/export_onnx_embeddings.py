@@ -0,0 +1,69 @@
+import os
+import argparse
+import numpy as np
+from crop_management_tools.crop_cultivation_guide.onnx_embeddings import ONNX_MODEL_DIR, ONNX_MODEL_FILE, OnnxMiniLMEmbeddings
+from crop_management_tools.crop_cultivation_guide.retriever_tool import EMBEDDING_MODEL
+
+# One-off export of the retriever's embedding model to int8 ONNX:
+#
+#   cd Backend && python -m crop_management_tools.crop_cultivation_guide.export_onnx_embeddings
+#
+# Needs torch + transformers (export) and onnxruntime (quantization); the
+# exported model itself only needs onnxruntime + tokenizers at runtime.
+
+_CHECK_SENTENCES = [
+    "How much urea should be applied to wheat?",
+    "Leaves of paddy turning yellow with brown spots",
+    "Best sowing time for chana in Madhya Pradesh",
+]
+
+
+def export(model_name: str = EMBEDDING_MODEL, out_dir: str = ONNX_MODEL_DIR, opset: int = 14):
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(out_dir)  # writes tokenizer.json for the fast tokenizer
+
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    sample = tokenizer(_CHECK_SENTENCES, padding=True, return_tensors="pt")
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            model, tuple(sample[n] for n in names), fp32_path,
+            input_names=names, output_names=["last_hidden_state"],
+            dynamic_axes={n: {0: "batch", 1: "sequence"} for n in names + ["last_hidden_state"]},
+            opset_version=opset,
+        )
+
+    # dynamic int8: weights quantized offline, activations per batch at runtime
+    quantize_dynamic(fp32_path, os.path.join(out_dir, ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+    return check(model_name, out_dir)
+
+
+def check(model_name: str = EMBEDDING_MODEL, out_dir: str = ONNX_MODEL_DIR) -> float:
+    """Smallest cosine similarity between the ONNX and the sentence-transformers vectors."""
+    from sentence_transformers import SentenceTransformer
+
+    reference = SentenceTransformer(model_name).encode(_CHECK_SENTENCES, normalize_embeddings=True)
+    onnx = OnnxMiniLMEmbeddings(out_dir).embed_batch(_CHECK_SENTENCES)
+    return float(np.min(np.sum(reference * onnx, axis=1)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the crop retriever's embedding model to int8 ONNX.")
+    parser.add_argument("--model", default=EMBEDDING_MODEL, help="Hugging Face model to export.")
+    parser.add_argument("--out", default=ONNX_MODEL_DIR, help="Output directory.")
+    parser.add_argument("--check-only", action="store_true", help="Only compare an existing export with the original model.")
+    args = parser.parse_args()
+
+    similarity = check(args.model, args.out) if args.check_only else export(args.model, args.out)
+    print(f"min cosine similarity to {args.model}: {similarity:.4f}")
+
+
+if __name__ == "__main__":
+    main()
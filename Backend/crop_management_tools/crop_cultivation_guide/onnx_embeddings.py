@@ -0,0 +1,144 @@
+import os
+import hashlib
+import queue
+import threading
+import numpy as np
+from concurrent.futures import Future
+
+# CPU embedding backend for the crop retriever: all-MiniLM-L6-v2 exported to
+# ONNX and int8-quantized (see export_onnx_embeddings.py), run with
+# onnxruntime + the `tokenizers` fast tokenizer instead of PyTorch.
+#
+# Pooling matches sentence-transformers (attention-masked mean, then L2
+# normalize), so the vectors are interchangeable with the ones the FAISS
+# index was built with.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ONNX_MODEL_DIR = os.getenv("CROP_ONNX_MODEL_DIR", os.path.join(BASE_DIR, "embedding_model_onnx"))
+ONNX_MODEL_FILE = "model_int8.onnx"
+
+# all-MiniLM-L6-v2 truncates its input at 256 word pieces.
+MAX_SEQ_LENGTH = 256
+
+# Concurrent queries are embedded together, up to this many per model call.
+MAX_BATCH = 32
+
+# onnxruntime intra-op threads; 0 keeps onnxruntime's default (all cores).
+ONNX_THREADS = int(os.getenv("CROP_ONNX_THREADS", "0"))
+
+
+def model_id(model_dir: str = ONNX_MODEL_DIR):
+    """sha1 of the exported model and tokenizer files (None if not exported), to tell builds apart."""
+    digest = hashlib.sha1()
+    for name in (ONNX_MODEL_FILE, "tokenizer.json"):
+        path = os.path.join(model_dir, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class MicroBatcher:
+    """
+    Runs `fn(list of items) -> list of results` on batches of concurrently
+    submitted items.
+
+    One worker thread takes everything that is queued (up to `max_batch`)
+    and handles it in one call. A lone request goes out immediately; while
+    a batch is running, new requests pile up and form the next batch, so
+    batching only happens when there is load and never adds a fixed delay.
+    """
+
+    def __init__(self, fn, max_batch: int = MAX_BATCH):
+        self.fn = fn
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def submit(self, item) -> Future:
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                    self._worker.start()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                results = self.fn([item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+
+
+class OnnxMiniLMEmbeddings:
+    """
+    int8 ONNX MiniLM with the `embed_query` / `embed_documents` interface of
+    LangChain embeddings, so it can replace HuggingFaceEmbeddings in the retriever.
+    """
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, max_batch: int = MAX_BATCH):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_path = os.path.join(model_dir, ONNX_MODEL_FILE)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"No ONNX model at '{model_path}'. Create it with "
+                "`python -m crop_management_tools.crop_cultivation_guide.export_onnx_embeddings`."
+            )
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ONNX_THREADS:
+            options.intra_op_num_threads = ONNX_THREADS
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self.session.get_inputs()}
+        self.max_batch = max_batch
+        self._batcher = MicroBatcher(self.embed_batch, max_batch)
+
+    def embed_batch(self, texts: list) -> np.ndarray:
+        """(len(texts), 384) float32 unit vectors for one model call."""
+        encodings = self.tokenizer.encode_batch(texts)
+        ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self._inputs:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+        hidden = self.session.run(None, feeds)[0]
+
+        weights = mask[..., None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+        return (pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)).astype(np.float32)
+
+    def embed_documents(self, texts: list) -> list:
+        # similar lengths in one batch means less padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+        for s in range(0, len(order), self.max_batch):
+            chunk = order[s:s + self.max_batch]
+            for i, vector in zip(chunk, self.embed_batch([texts[i] for i in chunk])):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> list:
+        return self._batcher.submit(text).result().tolist()
@@ -1,93 +1,242 @@
 import os
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
+import pickle
+import threading
+import numpy as np
+from common.lru_cache import LRUCache
+from crop_management_tools.crop_cultivation_guide.crop_name_index import filename_names
+
+# Semantic retrieval over the crop guides, backed by the FAISS index built in
+# RAG_Vector_Store.ipynb (`faiss_index_vectorstore/`).
+#
+# Nothing is loaded at import time: the index, its chunk texts and the
+# embedding model are loaded on the first query, so app startup stays fast.
+# The index file is memory-mapped where FAISS supports it, and reloaded when
+# it is rebuilt on disk (build_vector_index.py).
+#
+# Farmers ask the same questions over and over, so query embeddings and
+# top-k results are kept in LRU caches keyed by the exact query text (the
+# model sees case and punctuation); the result cache is dropped whenever the
+# index version changes, and hit rates are logged every CACHE_STATS_EVERY
+# searches.
 
-# --- Load once at startup ---
-# Load embedding model once
-
-
-# local_model_path = f"models--sentence-transformers--all-MiniLM-L6-v2"
-
-# embeddings = HuggingFaceEmbeddings(model_name=local_model_path)
-
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-
-
-# embeddings = HuggingFaceEmbeddings(
-#     model_name="C:/Users/sjasm/Documents/capital_one/Application/KisanAI/crop_management_tools/crop_cultivation_guide/embedding_model"
-# )
-
-# Get the directory where THIS file is located
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-print(f"BASE_DIR: {BASE_DIR}")
+INDEX_DIR = os.path.join(BASE_DIR, "faiss_index_vectorstore")
 
-# Absolute path to Chroma DB folder
-persist_directory = os.path.join(BASE_DIR, "chroma_langchain_db")
-
-# Load existing Chroma vector store
-vector_store = Chroma(
-    collection_name="example_collection",
-    embedding_function=embeddings,
-    persist_directory=persist_directory  # persistent location
-)
-
-# --- Tool function ---
-
-
-def retrieve_crop_cultivation_info(query: str, k: int = 3, score_threshold: float = 0.80) -> dict:
+EMBEDDING_MODEL = os.getenv("CROP_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+# "huggingface" (PyTorch sentence-transformers) or "onnx" (int8 ONNX MiniLM,
+# see onnx_embeddings.py; much smaller and faster on CPU-only machines).
+EMBEDDING_BACKEND = os.getenv("CROP_EMBEDDING_BACKEND", "huggingface")
+
+# Chunks below this cosine similarity are dropped.
+MIN_SCORE = 0.3
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("CROP_EMBEDDING_CACHE_SIZE", "2048"))
+RESULT_CACHE_SIZE = int(os.getenv("CROP_RESULT_CACHE_SIZE", "2048"))
+# Searches between two cache stats log lines (0 disables them).
+CACHE_STATS_EVERY = int(os.getenv("CROP_CACHE_STATS_EVERY", "500"))
+
+
+#---------------------docstore---------------------
+
+# index.pkl is LangChain's (InMemoryDocstore, {faiss id: docstore id}) pickle.
+# Only these two classes are allowed, and they are read into plain records,
+# so loading it needs neither LangChain nor trust in arbitrary pickles.
+_DOCSTORE_CLASSES = {
+    ("langchain_community.docstore.in_memory", "InMemoryDocstore"),
+    ("langchain_core.documents.base", "Document"),
+}
+
+
+class _Record:
+    def __setstate__(self, state):
+        self.__dict__.update(state.get("__dict__", state))
+
+
+class _DocstoreUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if (module, name) in _DOCSTORE_CLASSES:
+            return _Record
+        raise pickle.UnpicklingError(f"Unexpected class {module}.{name} in docstore.")
+
+
+def load_docstore(path: str):
+    """({faiss id: text}, {faiss id: metadata}) of a LangChain FAISS docstore."""
+    with open(path, "rb") as f:
+        docstore, id_map = _DocstoreUnpickler(f).load()
+    docs = {int(i): docstore._dict[doc_id] for i, doc_id in id_map.items()}
+    return {i: d.page_content for i, d in docs.items()}, {i: d.metadata for i, d in docs.items()}
+
+
+#---------------------retriever---------------------
+
+def make_embeddings(backend: str = EMBEDDING_BACKEND, model_name: str = EMBEDDING_MODEL):
+    """Embedding model with `embed_query` / `embed_documents` for the given backend."""
+    if backend == "onnx":
+        from crop_management_tools.crop_cultivation_guide.onnx_embeddings import OnnxMiniLMEmbeddings
+        return OnnxMiniLMEmbeddings()
+    if backend == "huggingface":
+        from langchain_huggingface import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(model_name=model_name)
+    raise ValueError(f"Unknown embedding backend '{backend}' (expected 'huggingface' or 'onnx').")
+
+
+def _read_index(path: str):
+    import faiss
+    try:
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        # index types without mmap support are read into memory
+        return faiss.read_index(path)
+
+
+def index_ids(index) -> np.ndarray:
+    """Labels a FAISS index returns: its id map for IndexIDMap indexes, else 0..ntotal-1."""
+    import faiss
+    if hasattr(index, "id_map"):
+        return faiss.vector_to_array(index.id_map)
+    return np.arange(index.ntotal, dtype=np.int64)
+
+
+class CropRetriever:
+    """Lazily loaded FAISS index + embedding model over the crop guide chunks."""
+
+    def __init__(self, index_dir: str = INDEX_DIR, model_name: str = EMBEDDING_MODEL, backend: str = EMBEDDING_BACKEND):
+        self.index_dir = index_dir
+        self.model_name = model_name
+        self.backend = backend
+        self.index = None
+        self.texts = {}       # faiss id -> chunk text
+        self.metadatas = {}   # faiss id -> chunk metadata
+        self.version = 0      # bumped whenever the index is (re)loaded
+        self._stamp = None
+        self._embeddings = None
+        self._lock = threading.Lock()
+        self.embedding_cache = LRUCache(EMBEDDING_CACHE_SIZE)   # query -> vector
+        self.result_cache = LRUCache(RESULT_CACHE_SIZE)         # (index version, query, k) -> hits
+        self._cached_version = None
+
+    def _files(self):
+        return os.path.join(self.index_dir, "index.faiss"), os.path.join(self.index_dir, "index.pkl")
+
+    def refresh(self):
+        """Load the index on first use and again whenever its files change on disk."""
+        index_path, docstore_path = self._files()
+        stamp = (os.path.getmtime(index_path), os.path.getmtime(docstore_path))
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    self._load(stamp)
+        return self
+
+    def _load(self, stamp):
+        index_path, docstore_path = self._files()
+        texts, metadatas = load_docstore(docstore_path)
+        index = _read_index(index_path)
+        if set(index_ids(index).tolist()) != set(texts):
+            # caught between the two file swaps of a rebuild: keep serving the
+            # previous index and retry on the next call
+            if self.index is None:
+                raise ValueError(f"FAISS index and docstore in '{self.index_dir}' do not match.")
+            print("VECTOR INDEX IS BEING REPLACED, USING PREVIOUS VERSION")
+            return
+        self.index, self.texts, self.metadatas = index, texts, metadatas
+        self._stamp = stamp
+        self.version += 1
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            with self._lock:
+                if self._embeddings is None:
+                    self._embeddings = make_embeddings(self.backend, self.model_name)
+        return self._embeddings
+
+    def embed(self, query: str) -> np.ndarray:
+        """Unit-length float32 vector of the query (read-only, cached per query text)."""
+        vector = self.embedding_cache.get(query)
+        if vector is None:
+            # the model sees the raw text: "pH 6.5-7.5" and "N:P:K" keep their punctuation
+            vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+            vector = vector / max(float(np.linalg.norm(vector)), 1e-12)
+            vector.flags.writeable = False
+            self.embedding_cache.put(query, vector)
+        return vector
+
+    def search(self, query: str, k: int = 3) -> list:
+        """Top-k (chunk id, cosine similarity), best first."""
+        self.refresh()
+        version = self.version
+        if version != self._cached_version:
+            self.result_cache.clear()
+            self._cached_version = version
+
+        key = (version, query, k)
+        hits = self.result_cache.get(key)
+        if hits is None:
+            distances, ids = self.index.search(self.embed(query)[None, :], k)
+            # vectors are unit length, so squared L2 distance d maps to cosine 1 - d / 2
+            hits = tuple((int(i), float(1 - d / 2)) for d, i in zip(distances[0], ids[0]) if i >= 0)
+            self.result_cache.put(key, hits)
+        else:
+            print("USING CACHED RETRIEVAL RESULTS")
+        searches = self.result_cache.hits + self.result_cache.misses
+        if CACHE_STATS_EVERY and searches % CACHE_STATS_EVERY == 0:
+            print(f"CROP RETRIEVER CACHE STATS: {self.cache_stats()}")
+        return list(hits)
+
+    def clear_caches(self):
+        """Empty the embedding and result caches (the counters keep running)."""
+        self.embedding_cache.clear()
+        self.result_cache.clear()
+
+    def cache_stats(self) -> dict:
+        """Size / hit-rate counters of the embedding and result caches."""
+        return {
+            "index_version": self.version,
+            "embeddings": self.embedding_cache.stats(),
+            "results": self.result_cache.stats(),
+        }
+
+
+crop_retriever = CropRetriever()
+
+
+#---------------------tool---------------------
+
+def retrieve_crop_cultivation_info(query: str, k: int = 3, min_score: float = MIN_SCORE) -> dict:
     """
-    Search the Chroma vector store for documents about crop cultivation.
-    Falls back if scores are too low.
+    Semantic search over the crop cultivation guides.
+
+    Finds guide passages by meaning rather than exact words, e.g. "my paddy
+    leaves are turning yellow" or "what to sow after kharif in black soil".
+
+    Args:
+        query (str): Free-text question.
+        k (int): Number of passages to return (default 3).
+        min_score (float): Minimum cosine similarity (0-1) of a passage to be returned.
+
+    Returns:
+        dict: {
+            "context": [
+                {"title": str, "source": str, "chunk": int, "score": float, "content": str},
+                ...
+            ]
+        }
+        where `source` is the guide filename (usable with `get_keys` / `get_context`).
     """
     print("RETRIEVE TOOL CALLED!")
-    results = vector_store.similarity_search_with_score(query, k=k)
-
     docs = []
-    for doc, score in results:
-        # Keep only relevant docs
-        if score >= score_threshold:
-            docs.append({
-                "title": doc.metadata.get("title", "Untitled"),
-                "source": doc.metadata.get("source", "Unknown"),
-                "content": doc.page_content
-            })
-
+    for chunk_id, score in crop_retriever.search(query, k):
+        if score < min_score:
+            continue
+        meta = crop_retriever.metadatas[chunk_id]
+        source = meta.get("source", "Unknown")
+        docs.append({
+            "title": meta.get("title") or filename_names(source)[0],
+            "source": source,
+            "chunk": meta.get("chunk"),
+            "score": round(score, 3),
+            "content": crop_retriever.texts[chunk_id],
+        })
     return {"context": docs}
-
-# def retrieve_crop_cultivation_info(query: str) -> dict:
-#     """
-#     Search the persistent Chroma vector store for documents about crop cultivation.
-
-#     Args:
-#         query (str): Search string.
-
-#     Returns:
-#         dict: {
-#             "context": [
-#                 {
-#                     "title": str,
-#                     "source": str,
-#                     "content": str
-#                 },
-#                 ...
-#             ]
-#         }
-#     """
-#     print("RETRIEVE TOOL CALLED!")
-#     results = vector_store.similarity_search(query, k=3)
-#     # print(f" Result: {results}")
-#     # print("change")
-#     docs = []
-#     for doc in results:
-#         docs.append({
-#             "title": doc.metadata.get("title", "Untitled"),
-#             "source": doc.metadata.get("source", "Unknown"),
-#             "content": doc.page_content
-#         })
-#     return {"context": docs}
-
-
-# if __name__ == "__main__":
-#     # Example usage
-#     result = retrieve_crop_cultivation_info("wheat cultivation steps")
-#     print(result)
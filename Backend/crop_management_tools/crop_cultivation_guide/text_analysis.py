@@ -0,0 +1,74 @@
+import re
+import math
+from collections import Counter
+
+# Text helpers shared by the crop guide index (crop_corpus.py) and the
+# full-text search (crop_search.py): tokenizing and extractive summaries.
+
+_STOPWORDS = set("""
+a an and are as at be by for from has have in into is it its of on or per such that the their then there
+these this to was were which will with can should may also about after before during under than not no
+how what when where who why do does i my we our you your
+""".split())
+
+_SUFFIXES = ("ations", "ation", "ities", "ity", "ings", "ing", "ness", "ment", "ies", "ers", "ed", "es", "er", "ly", "s", "e")
+
+
+def stem(token: str) -> str:
+    """Very light suffix stripping: borers -> bor, saline / salinity -> salin."""
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> list:
+    """Lowercase word / number tokens without stopwords, stemmed. Keeps 'p2o5', 'znso4', '12'."""
+    return [stem(t) for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in _STOPWORDS]
+
+
+def sentences(text: str) -> list:
+    """Non-empty sentences / lines of a text, in order."""
+    return [p.strip() for p in re.split(r"(?<=[.!?])\s+|\n", text) if p.strip()]
+
+
+def extractive_summary(text: str, max_chars: int = 400, units: list = None) -> str:
+    """
+    The most informative sentences of `text`, in their original order, within `max_chars`.
+
+    `units` replaces the sentence split of `text` with the caller's own
+    pieces (e.g. one per guide entry, see crop_corpus.section_units), so a
+    label is never picked without its entry.
+
+    Sentences are picked greedily: a sentence scores the summed section
+    frequency of its distinct terms over the square root of its length (so
+    long run-ons do not win), terms already covered by picked sentences count
+    a third, and numbers (doses, dates, spacings) and the opening sentence get
+    a bonus.
+    """
+    if len(text) <= max_chars:
+        return text
+    pieces = [u for u in units if u.strip()] if units else sentences(text)
+    freq = Counter(tokenize(text))
+    terms = [set(tokenize(p)) for p in pieces]
+    lengths = [math.sqrt(max(len(tokenize(p)), 1)) for p in pieces]
+    bonus = [(1.3 if re.search(r"\d", p) else 1.0) * (1.5 if i == 0 else 1.0) for i, p in enumerate(pieces)]
+
+    chosen, covered, used = [], set(), 0
+    # "... are as under:" only introduces what follows; alone it says nothing
+    candidates = {i for i, p in enumerate(pieces) if not p.endswith(":")}
+    while candidates:
+        def score(i):
+            return bonus[i] * sum(freq[t] * (0.33 if t in covered else 1.0) for t in terms[i]) / lengths[i]
+        best = max(candidates, key=score)
+        candidates.discard(best)
+        if not terms[best] or used + len(pieces[best]) + 1 > max_chars:
+            continue
+        chosen.append(best)
+        covered |= terms[best]
+        used += len(pieces[best]) + 1
+        if max_chars - used < 20:
+            break
+    if not chosen:
+        return pieces[0][:max_chars].rsplit(" ", 1)[0] + " ..."
+    return "\n".join(pieces[i] for i in sorted(chosen))
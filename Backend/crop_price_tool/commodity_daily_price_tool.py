@@ -1,5 +1,17 @@
-import os
-import requests
+import json
+import niquests
+from crop_price_tool.mandi_vocabulary import get_mandi_vocabulary
+from crop_price_tool.price_stats import summarize_prices
+from crop_price_tool.price_store import get_price_store
+
+# Mandi prices are answered from the local store (price_store.py), which a
+# daily job fills with the full data.gov.in resource. The live API is only
+# asked for rows newer than that snapshot, through the pooled paging client
+# in mandi_client.py. The records are reduced to a price table
+# (price_stats.py) before they reach the LLM. Filters are first mapped to
+# the dataset's own names (mandi_vocabulary.py), so a misspelled or Hindi
+# name does not end in an empty remote query.
+
 
 def get_crop_price_tool(
     state: str,
@@ -8,7 +20,7 @@ def get_crop_price_tool(
     market: str = None,
     variety: str = None,
     grade: str = None,
-    limit: int = 10
+    limit: int = 50
 ) -> str:
 
     """
@@ -27,39 +39,42 @@ def get_crop_price_tool(
         market:  Market name to filter prices. (Optional)
         variety:  Crop variety if applicable. (Optional)
         grade:  Grade of the commodity. (Optional)
-        limit:  Number of results to return. Default is 10. (Optional)
+        limit:  Maximum number of table rows (commodity / variety / market) to return. Default is 50. (Optional)
         commodity: The name of the crop. (Optional)
 
     Returns:
-        A JSON string with the crop price data.
+        A JSON string with prices of the latest arrival date, in Rs/quintal:
+        {"snapshot_date", "unit",
+         "summary": {commodity: {markets, lowest_modal, lowest_market, highest_modal, highest_market, mean_modal}},
+         "columns": [commodity, variety, market, min_price, max_price, modal_price, mean_price, records, latest_date],
+         "rows": [[...], ...], "rows_total": int}
     """
 
     print('CROP PRICE TOOL CALLED!')
-    api_key = os.getenv("COMMODITY_API_KEY")
-    url = "https://api.data.gov.in/resource/9ef84268-d588-465a-a308-a864a43d0070"
-    params = {
-        "api-key": api_key,
-        "format": "json",
-        "limit": limit,
-        "filters[state.keyword]": state,
-    }
-    if commodity:
-        params["filters[commodity]"] = commodity
-    if district:
-        params["filters[district]"] = district
-    if market:
-        params["filters[market]"] = market
-    if variety:
-        params["filters[variety]"] = variety
-    if grade:
-        params["filters[grade]"] = grade
+    store = get_price_store()
+    filters = dict(state=state, commodity=commodity, district=district, market=market, variety=variety, grade=grade)
+    vocabulary = get_mandi_vocabulary()
+    if vocabulary is not None:
+        try:
+            filters = vocabulary.normalize_filters(**filters)
+        except ValueError as e:
+            return str(e)
 
-    response = requests.get(url, params=params)
+    error = None
+    try:
+        store.refresh_from_remote(**filters)
+    except niquests.exceptions.HTTPError as e:
+        error = f"Error fetching data: {e.response.status_code} - {e.response.text}"
+    except (niquests.exceptions.RequestException, RuntimeError) as e:
+        error = f"Error fetching data: {e}"
 
-    if response.status_code == 200:
-        return response.text  # You can change this to `response.json()` if LLM can handle dicts
-    else:
-        return f"Error fetching data: {response.status_code} - {response.text}"
+    records = store.query(**filters)
+    if not records and error:
+        return error
+    if error:
+        print("USING STORED MANDI PRICES, LIVE CHECK FAILED")
+    return json.dumps(dict(snapshot_date=store.snapshot_date, **summarize_prices(records, max_rows=limit)),
+                      ensure_ascii=False, separators=(",", ":"))
     
 
 # if __name__ == "__main__":
@@ -0,0 +1,30 @@
+import argparse
+from crop_price_tool.price_history import get_price_history
+from crop_price_tool.price_store import STORE_PATH, PriceStore
+
+# Daily bulk snapshot of the data.gov.in mandi price resource into the local
+# store, e.g. from cron after the day's prices are published:
+#
+#   cd Backend && python -m crop_price_tool.ingest_mandi_prices
+#
+# --backfill-history copies the rows already in the store into the daily
+# price history (needed once for stores created before the history, or
+# before the history kept grades apart).
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest the full daily mandi price resource into the local store.")
+    parser.add_argument("--store", default=STORE_PATH, help="SQLite store path.")
+    parser.add_argument("--backfill-history", action="store_true",
+                        help="Append the rows already in the store to the price history, then exit.")
+    args = parser.parse_args()
+
+    store = PriceStore(args.store)
+    if args.backfill_history:
+        print({"history_records": get_price_history().append(store.rows())})
+        return
+    print(store.ingest_snapshot())
+
+
+if __name__ == "__main__":
+    main()
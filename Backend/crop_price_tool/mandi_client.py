@@ -0,0 +1,188 @@
+import os
+import asyncio
+import threading
+import weakref
+from collections import deque
+import niquests  # ships with openmeteo-requests (open_meteo_weather_tool)
+
+# Pooled async client for the data.gov.in "current daily price of various
+# commodities from various markets (mandi)" resource.
+#
+# Results are streamed page by page (offset / limit) from an async
+# generator. Up to MAX_CONCURRENCY pages are in flight at once and the
+# stream stops as soon as enough matching rows have arrived, so a
+# state-wide query no longer means one slow request for a single page.
+
+MANDI_RESOURCE_URL = "https://api.data.gov.in/resource/9ef84268-d588-465a-a308-a864a43d0070"
+
+# Records per request; data.gov.in caps `limit` per call.
+PAGE_SIZE = int(os.getenv("MANDI_PAGE_SIZE", "500"))
+# Pages fetched in parallel (also the connection pool size).
+MAX_CONCURRENCY = int(os.getenv("MANDI_MAX_CONCURRENCY", "4"))
+REQUEST_TIMEOUT = float(os.getenv("MANDI_TIMEOUT", "20"))
+
+# Record field -> API filter parameter. State is filtered on its keyword
+# (exact) sub-field, the others on the field itself.
+FILTER_FIELDS = {
+    "state": "filters[state.keyword]",
+    "district": "filters[district]",
+    "market": "filters[market]",
+    "commodity": "filters[commodity]",
+    "variety": "filters[variety]",
+    "grade": "filters[grade]",
+    "arrival_date": "filters[arrival_date]",  # dd/mm/yyyy
+}
+
+_async_clients = weakref.WeakKeyDictionary()
+_async_lock = threading.Lock()
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+#---------------------async client (one per event loop)---------------------
+
+def get_async_mandi_client() -> niquests.AsyncSession:
+    """
+    Return the pooled niquests session bound to the running event loop.
+
+    Async sessions keep their connections on the loop they were created on,
+    so sessions are cached per loop instead of globally.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        with _async_lock:
+            client = _async_clients.get(loop)
+            if client is None:
+                client = niquests.AsyncSession(
+                    retries=3,
+                    pool_connections=1,
+                    pool_maxsize=MAX_CONCURRENCY,
+                    timeout=REQUEST_TIMEOUT,
+                )
+                client.headers["User-Agent"] = "KrishiSewaAI/1.0"
+                _async_clients[loop] = client
+    return client
+
+
+async def close_async_clients():
+    """Close the session of the running loop (call on app shutdown)."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+
+def filter_params(**filters) -> dict:
+    """API query parameters for {field: value} filters; empty values are skipped."""
+    unknown = set(filters) - set(FILTER_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown mandi filter(s): {', '.join(sorted(unknown))}.")
+    return {FILTER_FIELDS[field]: value for field, value in filters.items() if value}
+
+
+async def fetch_page(params: dict, offset: int, limit: int = PAGE_SIZE) -> dict:
+    """One page of the resource: the JSON envelope with `total` and `records`."""
+    api_key = os.getenv("COMMODITY_API_KEY")
+    if not api_key:
+        raise RuntimeError("COMMODITY_API_KEY is not set.")
+    query = dict(params, **{"api-key": api_key, "format": "json", "offset": offset, "limit": limit})
+    response = await get_async_mandi_client().get(MANDI_RESOURCE_URL, params=query)
+    response.raise_for_status()
+    return response.json()
+
+
+async def iter_mandi_records(params: dict, max_records: int = None, predicate=None,
+                             page_size: int = PAGE_SIZE, max_concurrency: int = MAX_CONCURRENCY):
+    """
+    Async generator over the records matching `params` (see `filter_params`).
+
+    The first page tells the total; the remaining pages are requested with at
+    most `max_concurrency` in flight and yielded in offset order. Stops once
+    `max_records` records passing `predicate` (all records if None) have been
+    yielded, cancelling the pages still in flight.
+
+    Offsets advance by the number of records the API actually returns (it may
+    cap `limit` below `page_size`), and a short page before `total` (or, with
+    no total reported, before an empty page) is completed with a follow-up
+    request, so no record is skipped.
+    """
+    first = await fetch_page(params, 0, page_size)
+    total = int(first.get("total") or 0)
+    step = len(first.get("records", []))
+    # without a total, pages are read until one comes back empty
+    more = step and (not total or step < total)
+    pages = deque([(0, page_size, first)])
+    pending = deque()   # (offset, limit, future) in offset order
+    next_offset = step
+
+    def request(offset, limit):
+        return offset, limit, asyncio.ensure_future(fetch_page(params, offset, limit))
+
+    def schedule():
+        nonlocal next_offset
+        if more and (not total or next_offset < total):
+            pending.append(request(next_offset, step))
+            next_offset += step
+
+    for _ in range(max_concurrency):
+        schedule()
+
+    yielded = 0
+    try:
+        while pages or pending:
+            if pages:
+                offset, limit, page = pages.popleft()
+            else:
+                offset, limit, future = pending.popleft()
+                page = await future
+            records = page.get("records", [])
+            received = len(records)
+            if not received:
+                more = False
+            elif offset and received < limit and (not total or offset + received < total):
+                # short page in the middle: fetch the rest before moving on
+                pending.appendleft(request(offset + received, limit - received))
+            schedule()
+            for record in records:
+                if predicate is None or predicate(record):
+                    yield record
+                    yielded += 1
+                    if max_records is not None and yielded >= max_records:
+                        return
+    finally:
+        for _, _, task in pending:
+            task.cancel()
+
+
+#---------------------sync access---------------------
+# The agent tools are called synchronously, possibly from a thread that is
+# already running an event loop (FastAPI), so the async client runs on one
+# background loop shared by all callers and keeps its pool between calls.
+
+def _background_loop():
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="mandi-client", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def run_sync(coro, timeout: float = None):
+    """Run a coroutine on the background loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result(timeout)
+
+
+async def _collect(params, max_records, predicate):
+    return [r async for r in iter_mandi_records(params, max_records=max_records, predicate=predicate)]
+
+
+def fetch_mandi_records(max_records: int = None, predicate=None, **filters) -> list:
+    """
+    All records matching the filters (state, district, market, commodity,
+    variety, grade), up to `max_records`, fetched with concurrent pages.
+    """
+    return run_sync(_collect(filter_params(**filters), max_records, predicate))
@@ -0,0 +1,196 @@
+import math
+import threading
+from difflib import SequenceMatcher
+import numpy as np
+from common.fuzzy_index import normalize
+from crop_price_tool.mandi_vocabulary import market_alias, short_alias, get_mandi_vocabulary
+from open_meteo_weather_tool.gazetteer import get_gazetteer
+
+# Nearest mandis to a coordinate, without a geocoding round trip.
+#
+# Every market of the price dataset (mandi_vocabulary.py) is placed with the
+# offline gazetteer: on its own town if the gazetteer knows it, otherwise on
+# its district headquarters or the middle of the district's known places.
+# Only exact or transliterated names in the same state count, since a fuzzy
+# match puts a market in the wrong town; markets that can not be placed are
+# counted and reported instead. The points go into a fixed lat / lon grid,
+# and a lookup scans rings of cells around the user until no unvisited cell
+# can hold anything closer than the k-th mandi found.
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+
+# Grid cell size in degrees (~55 km); a handful of mandis per cell in India.
+CELL_DEGREES = 0.5
+
+# Gazetteer state names and dataset state names differ in spelling
+# ("Chhattisgarh" / "Chattisgarh"); anything above this ratio is the same state.
+STATE_MATCH = 0.8
+
+# Gazetteer score a market or district name needs: exact (1.0) or the same
+# name in another transliteration (0.95), never a typo-level match.
+PLACE_MATCH = 0.95
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distance (km) from one point to arrays of points."""
+    lat, lon, lats, lons = map(np.radians, (lat, lon, lats, lons))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _same_state(a: str, b: str) -> bool:
+    return SequenceMatcher(None, normalize(a), normalize(b)).ratio() >= STATE_MATCH
+
+
+class MandiLocator:
+    """Grid index over geocoded markets ({state, district, market, lat, lon, located_by})."""
+
+    def __init__(self, markets: list, cell: float = CELL_DEGREES, unplaced: list = ()):
+        self.markets = markets
+        self.unplaced = list(unplaced)     # (state, district, market) missing from the index
+        self.cell = cell
+        self._ids = {(m["state"], m["district"], m["market"]): i for i, m in enumerate(markets)}
+        self.lats = np.array([m["lat"] for m in markets], dtype=np.float64)
+        self.lons = np.array([m["lon"] for m in markets], dtype=np.float64)
+
+        rows = np.floor(self.lats / cell).astype(np.int64)
+        cols = np.floor(self.lons / cell).astype(np.int64)
+        order = np.lexsort((cols, rows))
+        self.cells = {}
+        for i in order:
+            self.cells.setdefault((int(rows[i]), int(cols[i])), []).append(int(i))
+        self.cells = {key: np.array(ids) for key, ids in self.cells.items()}
+        self._cell_keys = np.array(list(self.cells), dtype=np.int64).reshape(-1, 2)
+
+    def __len__(self):
+        return len(self.markets)
+
+    def _ring(self, row: int, col: int, r: int):
+        if r == 0:
+            yield row, col
+            return
+        for c in range(col - r, col + r + 1):
+            yield row - r, c
+            yield row + r, c
+        for rr in range(row - r + 1, row + r):
+            yield rr, col - r
+            yield rr, col + r
+
+    def _outside_km(self, lat: float, lon: float, row: int, col: int, r: int) -> float:
+        """Lower bound on the distance to any point outside the (2r+1)^2 cells around (row, col)."""
+        south, north = (row - r) * self.cell, (row + r + 1) * self.cell
+        west, east = (col - r) * self.cell, (col + r + 1) * self.cell
+        lat_gap = min(lat - south, north - lat) * KM_PER_DEGREE
+        lon_scale = math.cos(math.radians(min(max(abs(south), abs(north)), 89.9)))
+        lon_gap = min(lon - west, east - lon) * KM_PER_DEGREE * lon_scale
+        return min(lat_gap, lon_gap)
+
+    def nearest(self, lat: float, lon: float, k: int = 5, max_km: float = None, allowed=None) -> list:
+        """
+        Up to `k` markets closest to (lat, lon), nearest first, each with
+        `distance_km`. `allowed`: only these (state, district, market) keys.
+        """
+        if not len(self.markets) or k <= 0:
+            return []
+        mask = None
+        if allowed is not None:
+            mask = np.zeros(len(self.markets), dtype=bool)
+            mask[[self._ids[key] for key in allowed if key in self._ids]] = True
+        row, col = int(math.floor(lat / self.cell)), int(math.floor(lon / self.cell))
+        found = []
+        best = np.empty(0)
+        # ring that reaches the farthest occupied cell
+        far = int(np.abs(self._cell_keys - (row, col)).max())
+        for r in range(far + 1):
+            ids = [self.cells[key] for key in self._ring(row, col, r) if key in self.cells]
+            if mask is not None:
+                ids = [i[mask[i]] for i in ids if mask[i].any()]
+            if ids:
+                found.append(np.concatenate(ids))
+                candidates = np.concatenate(found)
+                dist = haversine_km(lat, lon, self.lats[candidates], self.lons[candidates])
+                keep = np.argsort(dist, kind="stable")[:k]
+                found, best = [candidates[keep]], dist[keep]
+            bound = self._outside_km(lat, lon, row, col, r)
+            if len(best) == k and best[-1] <= bound:
+                break
+            if max_km is not None and bound > max_km:
+                break
+
+        results = []
+        for i, d in zip(found[0] if found else [], best):
+            if max_km is not None and d > max_km:
+                break
+            results.append(dict(self.markets[i], distance_km=round(float(d), 1)))
+        return results
+
+
+#---------------------geocoding the dataset markets---------------------
+
+def _place(gazetteer, name: str, state: str):
+    """Gazetteer place of this exact (or transliterated) name in `state`, or None."""
+    match = gazetteer.lookup(name, cutoff=PLACE_MATCH) if name else None
+    return match if match and _same_state(match.get("state", ""), state) else None
+
+
+def _district_centre(gazetteer, district: str, state: str):
+    """Mean position of the gazetteer places listed in this district, or None."""
+    places = [p for p in gazetteer.places if normalize(p.get("district", "")) == normalize(district)
+              and _same_state(p.get("state", ""), state)]
+    if not places:
+        return None
+    return {"lat": float(np.mean([p["lat"] for p in places])), "lon": float(np.mean([p["lon"] for p in places]))}
+
+
+def locate_markets(vocabulary, gazetteer):
+    """
+    Place every (state, district, market) of the vocabulary with the offline
+    gazetteer. Returns (markets, unplaced (state, district, market) keys).
+    """
+    markets, unplaced = [], []
+    for state, districts in vocabulary.districts.items():
+        for district, names in districts.items():
+            district_place = None
+            for market in sorted(names):
+                place, located_by = None, "market"
+                for name in dict.fromkeys((market_alias(market), short_alias(market))):
+                    place = _place(gazetteer, name, state)
+                    if place:
+                        break
+                if place is None:
+                    if district_place is None:
+                        district_place = (_place(gazetteer, district, state)
+                                          or _district_centre(gazetteer, district, state) or False)
+                    place, located_by = district_place or None, "district"
+                if place:
+                    markets.append({"state": state, "district": district, "market": market,
+                                    "lat": place["lat"], "lon": place["lon"], "located_by": located_by})
+                else:
+                    unplaced.append((state, district, market))
+    return markets, unplaced
+
+
+_locator = None
+_locator_vocabulary = None
+_locator_lock = threading.Lock()
+
+
+def get_mandi_locator():
+    """
+    Process-wide nearest-mandi index, rebuilt with the vocabulary (after each
+    new snapshot). None while the price store is empty.
+    """
+    global _locator, _locator_vocabulary
+    vocabulary = get_mandi_vocabulary()
+    if vocabulary is None:
+        return None
+    if _locator_vocabulary is not vocabulary:
+        with _locator_lock:
+            if _locator_vocabulary is not vocabulary:
+                markets, unplaced = locate_markets(vocabulary, get_gazetteer())
+                if unplaced:
+                    print(f"MANDI LOCATOR: {len(unplaced)} of {len(vocabulary)} markets could not be placed")
+                _locator = MandiLocator(markets, unplaced=unplaced)
+                _locator_vocabulary = vocabulary
+    return _locator
@@ -0,0 +1,210 @@
+import os
+import re
+import json
+import threading
+from common.fuzzy_index import FuzzyIndex
+from crop_price_tool.price_store import get_price_store
+
+# Canonical names of the mandi price dataset, so LLM-extracted filters can
+# be fixed before they reach the exact-match API filters.
+#
+# States, districts, markets, commodities and varieties are read from the
+# local price store (price_store.py) with the state -> district -> market
+# hierarchy, plus English / Hindi aliases from data/mandi_aliases.json.
+# Misspelled names are corrected with FuzzyIndex, a district outside its
+# state or a market outside its district is rejected without a request.
+# Without a state, a district or market names its own state when it exists
+# in only one.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ALIASES_FILE = os.path.join(BASE_DIR, "data", "mandi_aliases.json")
+
+# Fuzzy matches below this score are rejected with suggestions instead.
+STATE_CUTOFF = 0.85
+NAME_CUTOFF = 0.8
+
+# Words users add to market names that are not part of the dataset name.
+_MARKET_NOISE = re.compile(r"\b(mandi|apmc|market|krishi upaj|agricultural produce market committee|yard)\b|[()]", re.I)
+
+
+def market_alias(name: str) -> str:
+    return " ".join(_MARKET_NOISE.sub(" ", name).split())
+
+
+def short_alias(name: str) -> str:
+    """Name before its first parenthesis: "Pune(Moshi)" -> "Pune"."""
+    return market_alias(name.split("(")[0])
+
+
+class MandiVocabulary:
+    """Canonical state / district / market / commodity / variety names with fuzzy and alias lookups."""
+
+    def __init__(self, rows, aliases_file: str = ALIASES_FILE):
+        """`rows`: (state, district, market, commodity, variety) tuples of the distinct dataset names."""
+        with open(aliases_file, "r", encoding="utf-8") as f:
+            aliases = json.load(f)
+
+        self.districts = {}     # state -> {district: {markets}}
+        self.markets = {}       # (state, market) -> district
+        self.varieties = {}     # commodity -> {varieties}
+        self.traded = {}        # commodity -> {(state, district, market)}
+        self.commodities = set()
+        for state, district, market, commodity, variety in rows:
+            self.districts.setdefault(state, {}).setdefault(district, set()).add(market)
+            self.markets[(state, market)] = district
+            self.commodities.add(commodity)
+            self.varieties.setdefault(commodity, set()).add(variety)
+            self.traded.setdefault(commodity, set()).add((state, district, market))
+
+        self._states = FuzzyIndex()
+        for state in self.districts:
+            self._states.add(state, state)
+        for alias, state in aliases.get("states", {}).items():
+            if state in self.districts:
+                self._states.add(alias, state)
+
+        self._commodities = FuzzyIndex()
+        for commodity in self.commodities:
+            self._commodities.add(commodity, commodity)
+            self._commodities.add(short_alias(commodity), commodity)  # "Paddy(Dhan)(Common)" -> "Paddy"
+        for alias, commodity in aliases.get("commodities", {}).items():
+            if commodity in self.commodities:
+                self._commodities.add(alias, commodity)
+
+        # per state, built on first use
+        self._district_index = {}
+        self._market_index = {}
+        self._variety_index = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.markets)
+
+    #---------------------lookups---------------------
+
+    def _index(self, cache: dict, key, names):
+        index = cache.get(key)
+        if index is None:
+            with self._lock:
+                index = cache.get(key)
+                if index is None:
+                    index = FuzzyIndex()
+                    shorts = {}
+                    for name in names:
+                        index.add(name, name)
+                        alias = market_alias(name)
+                        if alias:
+                            index.add(alias, name)
+                        shorts.setdefault(short_alias(name), []).append(name)
+                    # "Pune" -> "Pune(Moshi)", unless several names share it
+                    for alias, full in shorts.items():
+                        if alias and len(full) == 1:
+                            index.add(alias, full[0])
+                    cache[key] = index
+        return index
+
+    @staticmethod
+    def _resolve(index: FuzzyIndex, kind: str, value: str, cutoff: float, where: str = ""):
+        match = index.best(value, cutoff=cutoff) or index.best(market_alias(value), cutoff=cutoff)
+        if match:
+            return match[0]
+        suggestions = [m[0] for m in index.search(value, limit=3, cutoff=0.5)]
+        hint = f" Did you mean: {', '.join(suggestions)}?" if suggestions else ""
+        raise ValueError(f"'{value}' is not a {kind}{where} in the mandi price data.{hint}")
+
+    def state(self, name: str) -> str:
+        return self._resolve(self._states, "state", name, STATE_CUTOFF)
+
+    def commodity(self, name: str) -> str:
+        return self._resolve(self._commodities, "commodity", name, NAME_CUTOFF)
+
+    def _infer_state(self, district: str = None, market: str = None) -> str:
+        """The only state with this district / market (best score), for filters given without a state."""
+        kind, value = ("district", district) if district else ("market", market)
+        scores = {}
+        for state, districts in self.districts.items():
+            if district:
+                index = self._index(self._district_index, state, districts)
+            else:
+                index = self._index(self._market_index, (state, None), {m for ms in districts.values() for m in ms})
+            match = index.best(value, cutoff=NAME_CUTOFF) or index.best(market_alias(value), cutoff=NAME_CUTOFF)
+            if match:
+                scores[state] = match[2]
+        if not scores:
+            raise ValueError(f"'{value}' is not a {kind} in the mandi price data.")
+        top = max(scores.values())
+        states = sorted(s for s, score in scores.items() if score == top)
+        if len(states) > 1:
+            raise ValueError(f"'{value}' matches a {kind} in several states ({', '.join(states)}); give the state.")
+        return states[0]
+
+    def normalize_filters(self, state: str = None, district: str = None, market: str = None,
+                          commodity: str = None, variety: str = None, grade: str = None) -> dict:
+        """
+        Canonical filters for the price store / API. Raises ValueError naming
+        the unknown value (with suggestions) or the impossible combination.
+        Without a state, it is taken from the district or market.
+        """
+        if not state and (district or market):
+            state = self._infer_state(district, market)
+        if not state:
+            commodity = self.commodity(commodity) if commodity else None
+            if commodity and variety:
+                variety = self._resolve(self._index(self._variety_index, commodity, self.varieties[commodity]),
+                                        "variety", variety, NAME_CUTOFF, f" of {commodity}")
+            return {"state": None, "district": None, "market": None,
+                    "commodity": commodity, "variety": variety, "grade": grade}
+        state = self.state(state)
+        districts = self.districts[state]
+
+        if district:
+            district = self._resolve(self._index(self._district_index, state, districts),
+                                     "district", district, NAME_CUTOFF, f" in {state}")
+        if market:
+            names = districts[district] if district else {m for ms in districts.values() for m in ms}
+            where = f" in {district} district, {state}" if district else f" in {state}"
+            try:
+                market = self._resolve(self._index(self._market_index, (state, district), names),
+                                       "market", market, NAME_CUTOFF, where)
+            except ValueError:
+                if not district:
+                    raise
+                # the market exists in the state, but not in this district
+                elsewhere = self._index(self._market_index, (state, None),
+                                        {m for ms in districts.values() for m in ms}).best(market, cutoff=NAME_CUTOFF)
+                if elsewhere is None:
+                    raise
+                raise ValueError(f"Market '{elsewhere[0]}' is in {self.markets[(state, elsewhere[0])]} district, "
+                                 f"not in {district} district.")
+            district = district or self.markets[(state, market)]
+
+        if commodity:
+            commodity = self.commodity(commodity)
+            if variety:
+                variety = self._resolve(self._index(self._variety_index, commodity, self.varieties[commodity]),
+                                        "variety", variety, NAME_CUTOFF, f" of {commodity}")
+
+        return {"state": state, "district": district, "market": market,
+                "commodity": commodity, "variety": variety, "grade": grade}
+
+
+_vocabulary = None
+_vocabulary_stamp = None
+_vocabulary_lock = threading.Lock()
+
+
+def get_mandi_vocabulary():
+    """
+    Process-wide vocabulary of the local price store, rebuilt after each new
+    snapshot. None while the store is empty (filters can not be checked).
+    """
+    global _vocabulary, _vocabulary_stamp
+    store = get_price_store()
+    stamp = (store.snapshot_date, store.get_meta("ingested_at"))
+    if _vocabulary_stamp != stamp:
+        with _vocabulary_lock:
+            if _vocabulary_stamp != stamp:
+                rows = store.distinct_names()
+                _vocabulary = MandiVocabulary(rows) if rows else None
+                _vocabulary_stamp = stamp
+    return _vocabulary
@@ -0,0 +1,81 @@
+import json
+from crop_price_tool.mandi_locator import get_mandi_locator
+from crop_price_tool.mandi_vocabulary import get_mandi_vocabulary
+from crop_price_tool.price_stats import summarize_prices
+from crop_price_tool.price_store import get_price_store
+
+# "What are onion prices near me?" straight from the user's coordinates:
+# the nearest markets come from the offline grid index (mandi_locator.py)
+# and their prices from the local store, so no geocoding or API round trip
+# is needed.
+
+
+def get_nearest_mandi_prices_tool(
+    lat: float,
+    lon: float,
+    commodity: str = None,
+    k: int = 5,
+    max_km: float = None,
+    limit: int = 50
+) -> str:
+
+    """
+    Fetches crop prices at the mandis nearest to the user's coordinates.
+    Use it when the user asks about prices "near me" / "nearby mandis", or gives no state but their location is known.
+
+    Args:
+    Required:
+        lat: Latitude of the user. (Required)
+        lon: Longitude of the user. (Required)
+
+    Optional:
+        commodity: The name of the crop. (Optional)
+        k:  Number of nearest mandis. Default is 5. (Optional)
+        max_km:  Ignore mandis farther than this many km. (Optional)
+        limit:  Maximum number of table rows (commodity / variety / market) to return. Default is 50. (Optional)
+
+    Returns:
+        A JSON string, prices of the latest arrival date in Rs/quintal:
+        {"snapshot_date",
+         "mandis": [[market, district, state, distance_km], ...] nearest first (only mandis trading the commodity),
+         "note": how many mandis could not be located, if any,
+         "unit", "summary", "columns", "rows", "rows_total"} (as in the Crop Price Tool)
+    """
+
+    print('NEAREST MANDI PRICE TOOL CALLED!')
+    locator = get_mandi_locator()
+    if locator is None:
+        return "Mandi prices have not been loaded yet."
+
+    traded, unplaced = None, locator.unplaced
+    if commodity:
+        vocabulary = get_mandi_vocabulary()
+        try:
+            commodity = vocabulary.commodity(commodity)
+        except ValueError as e:
+            return str(e)
+        # only mandis that trade the crop compete for the k slots
+        traded = vocabulary.traded.get(commodity, set())
+        unplaced = [key for key in unplaced if key in traded]
+
+    mandis = locator.nearest(float(lat), float(lon), k=int(k), max_km=max_km, allowed=traded)
+    if not mandis:
+        return f"No mandi found within {max_km} km." if max_km else "No mandi found."
+
+    store = get_price_store()
+    records = []
+    for m in mandis:
+        records.extend(store.query(state=m["state"], district=m["district"], market=m["market"], commodity=commodity))
+
+    result = {
+        "snapshot_date": store.snapshot_date,
+        "mandis": [[m["market"], m["district"], m["state"], m["distance_km"]] for m in mandis],
+    }
+    if unplaced:
+        result["note"] = f"{len(unplaced)} mandi(s) could not be located on the map and were not considered."
+    result.update(summarize_prices(records, max_rows=limit))
+    return json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+
+
+# if __name__ == "__main__":
+#     print(get_nearest_mandi_prices_tool(22.72, 75.86, commodity="Onion"))
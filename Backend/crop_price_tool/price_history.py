@@ -0,0 +1,204 @@
+import os
+import re
+import json
+import threading
+import numpy as np
+
+# Append-only daily price history, one binary file per commodity.
+#
+# Every row is a fixed 20-byte record (day, series id, min / max / modal
+# price) appended to .cache/mandi_history/v2/<commodity>.bin; a series is
+# one (state, district, market, commodity, variety, grade) and its id is
+# kept in the append-only series.jsonl. Reads load a commodity once, sort it
+# by day and answer date ranges with np.searchsorted until the file grows
+# again.
+
+# v2: grade is part of the series (v1 mixed the grades of a market / variety
+# into one series); rebuild with ingest_mandi_prices.py --backfill-history.
+HISTORY_DIR = os.path.join(".cache", "mandi_history", "v2")
+
+SERIES_FIELDS = ("state", "district", "market", "commodity", "variety", "grade")
+PRICE_FIELDS = ("min_price", "max_price", "modal_price")
+
+RECORD_DTYPE = np.dtype([
+    ("day", "<i4"),        # days since 1970-01-01
+    ("series", "<i4"),
+    ("min_price", "<f4"),
+    ("max_price", "<f4"),
+    ("modal_price", "<f4"),
+])
+
+
+def to_day(value: str) -> int:
+    """ISO date -> days since epoch."""
+    return int(np.datetime64(value, "D").astype(np.int64))
+
+
+def from_day(day: int) -> str:
+    return str(np.datetime64(int(day), "D"))
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", name.strip().lower()).strip("_") or "unknown"
+
+
+def _price(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _keys(rows) -> np.ndarray:
+    """(series, day) of records as one sortable int64."""
+    return rows["series"].astype(np.int64) << 32 | rows["day"].astype(np.int64)
+
+
+def _last_per_key(keys: np.ndarray) -> np.ndarray:
+    """Indices of the last occurrence of every key, in key order."""
+    order = np.argsort(keys, kind="stable")
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = keys[order][1:] != keys[order][:-1]
+    return order[last]
+
+
+class PriceHistory:
+    """Per-commodity daily price records with fast date-range reads."""
+
+    def __init__(self, root: str = HISTORY_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._series = {}      # series key (lowercased fields) -> id
+        self._names = []       # id -> {field: value}
+        self._loaded = {}      # commodity slug -> (file size, records sorted by day, existing keys)
+        os.makedirs(root, exist_ok=True)
+        self._series_path = os.path.join(root, "series.jsonl")
+        if os.path.exists(self._series_path):
+            with open(self._series_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._register(json.loads(line))
+
+    def _register(self, names: dict) -> int:
+        key = tuple(names.get(f, "").lower() for f in SERIES_FIELDS)
+        self._series[key] = len(self._names)
+        self._names.append(names)
+        return self._series[key]
+
+    def series(self, series_id: int) -> dict:
+        return self._names[series_id]
+
+    #---------------------writes---------------------
+
+    def append(self, records) -> int:
+        """
+        Append price records (dicts with the series fields, ISO `arrival_date`
+        and prices). Days already stored for a series are skipped unless the
+        prices changed. Returns the number of records written.
+        """
+        by_commodity = {}
+        with self._lock:
+            new_series = []
+            for record in records:
+                names = {f: (record.get(f) or "").strip() for f in SERIES_FIELDS}
+                if not names["commodity"] or not record.get("arrival_date"):
+                    continue
+                key = tuple(v.lower() for v in names.values())
+                series_id = self._series.get(key)
+                if series_id is None:
+                    series_id = self._register(names)
+                    new_series.append(names)
+                row = (to_day(record["arrival_date"]), series_id,
+                       _price(record.get("min_price")), _price(record.get("max_price")), _price(record.get("modal_price")))
+                by_commodity.setdefault(_slug(names["commodity"]), []).append(row)
+
+            if new_series:
+                with open(self._series_path, "a", encoding="utf-8") as f:
+                    for names in new_series:
+                        f.write(json.dumps(names, ensure_ascii=False) + "\n")
+
+            written = 0
+            for slug, rows in by_commodity.items():
+                rows = np.array(rows, dtype=RECORD_DTYPE)
+                keys = _keys(rows)
+                # one row per (series, day); the last one of the batch wins
+                last = _last_per_key(keys)
+                rows, keys = rows[last], keys[last]
+                _, existing, known = self._load(slug)
+                if len(existing):
+                    pos = np.searchsorted(known["key"], keys)
+                    found = pos < len(known)
+                    found[found] = known["key"][pos[found]] == keys[found]
+                    same = found.copy()
+                    for field in PRICE_FIELDS:
+                        old, new = known[field][pos[found]], rows[field][found]
+                        same[found] &= (old == new) | (np.isnan(old) & np.isnan(new))
+                    rows = rows[~same]
+                if len(rows):
+                    with open(os.path.join(self.root, slug + ".bin"), "ab") as f:
+                        rows.tofile(f)
+                    written += len(rows)
+            return written
+
+    #---------------------reads---------------------
+
+    def _load(self, slug: str):
+        """(size, records sorted by day, latest row per (series, day) sorted by key) of a commodity file."""
+        path = os.path.join(self.root, slug + ".bin")
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        cached = self._loaded.get(slug)
+        if cached and cached[0] == size:
+            return cached
+        data = np.fromfile(path, dtype=RECORD_DTYPE) if size else np.empty(0, dtype=RECORD_DTYPE)
+        # a later write of the same (series, day) wins
+        keys = _keys(data)
+        order = _last_per_key(keys)
+        known = np.empty(len(order), dtype=[("key", "<i8")] + [(f, "<f4") for f in PRICE_FIELDS])
+        known["key"] = keys[order]
+        for field in PRICE_FIELDS:
+            known[field] = data[field][order]
+        latest = data[order]
+        latest = latest[np.argsort(latest["day"], kind="stable")]
+        self._loaded[slug] = (size, latest, known)
+        return self._loaded[slug]
+
+    def read(self, commodity: str, start: str = None, end: str = None, **filters) -> np.ndarray:
+        """
+        Records of a commodity between ISO dates `start` and `end` (inclusive),
+        sorted by day, optionally filtered by state / district / market / variety / grade.
+        """
+        unknown = set(filters) - set(SERIES_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown history filter(s): {', '.join(sorted(unknown))}.")
+        with self._lock:
+            _, data, _ = self._load(_slug(commodity))
+        lo = np.searchsorted(data["day"], to_day(start), "left") if start else 0
+        hi = np.searchsorted(data["day"], to_day(end), "right") if end else len(data)
+        data = data[lo:hi]
+
+        wanted = {f: v.strip().lower() for f, v in filters.items() if v}
+        if wanted:
+            ids = [i for i, names in enumerate(self._names)
+                   if all(names[f].lower() == v for f, v in wanted.items())]
+            data = data[np.isin(data["series"], ids)]
+        return data
+
+    def last_day(self, commodity: str):
+        """Latest ISO date stored for a commodity, or None."""
+        with self._lock:
+            _, data, _ = self._load(_slug(commodity))
+        return from_day(data["day"][-1]) if len(data) else None
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_price_history() -> PriceHistory:
+    """Process-wide price history (created on first use)."""
+    global _history
+    if _history is None:
+        with _history_lock:
+            if _history is None:
+                _history = PriceHistory()
+    return _history
@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+
+# Price statistics computed once on the server, so the agent gets a small
+# table with exact numbers instead of raw records to add up itself.
+
+PRICE_UNIT = "Rs/quintal"
+
+GROUP_FIELDS = ["commodity", "variety", "market"]
+TABLE_COLUMNS = ["commodity", "variety", "market", "min_price", "max_price", "modal_price", "mean_price", "records", "latest_date"]
+
+
+def _round(values):
+    return np.round(values.astype(np.float64), 0)
+
+
+def price_table(records: list) -> pd.DataFrame:
+    """
+    One row per (commodity, variety, market): lowest min price, highest max
+    price, median and mean of the modal prices, record count, latest date.
+    """
+    if not records:
+        return pd.DataFrame(columns=TABLE_COLUMNS)
+    df = pd.DataFrame.from_records(records, columns=GROUP_FIELDS + ["arrival_date", "min_price", "max_price", "modal_price"])
+    for col in ("min_price", "max_price", "modal_price"):
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    table = df.groupby(GROUP_FIELDS, sort=True).agg(
+        min_price=("min_price", "min"),
+        max_price=("max_price", "max"),
+        modal_price=("modal_price", "median"),
+        mean_price=("modal_price", "mean"),
+        records=("modal_price", "size"),
+        latest_date=("arrival_date", "max"),
+    ).reset_index()
+    for col in ("min_price", "max_price", "modal_price", "mean_price"):
+        table[col] = _round(table[col])
+    return table[TABLE_COLUMNS]
+
+
+def commodity_summary(table: pd.DataFrame) -> dict:
+    """Per commodity across markets: range of modal prices, mean, and the cheapest / dearest market."""
+    summary = {}
+    if table.empty:
+        return summary
+    for commodity, group in table.groupby("commodity", sort=True):
+        modal = group["modal_price"].to_numpy()
+        valid = ~np.isnan(modal)
+        if not valid.any():
+            continue
+        lo, hi = np.nanargmin(modal), np.nanargmax(modal)
+        summary[commodity] = {
+            "markets": int(group["market"].nunique()),
+            "lowest_modal": float(modal[lo]),
+            "lowest_market": group["market"].iloc[lo],
+            "highest_modal": float(modal[hi]),
+            "highest_market": group["market"].iloc[hi],
+            "mean_modal": float(np.round(np.nanmean(modal), 0)),
+        }
+    return summary
+
+
+def summarize_prices(records: list, max_rows: int = None) -> dict:
+    """
+    Compact price summary of mandi records:
+    {"unit", "summary": {commodity: {...}}, "columns": [...], "rows": [[...], ...], "rows_total"}.
+    """
+    table = price_table(records)
+    rows = table.head(max_rows) if max_rows else table
+    values = rows.astype(object).where(rows.notna(), None).values.tolist()
+    for row in values:
+        for i in range(3, 7):  # prices as plain ints
+            if row[i] is not None:
+                row[i] = int(row[i])
+    return {
+        "unit": PRICE_UNIT,
+        "summary": commodity_summary(table),
+        "columns": TABLE_COLUMNS,
+        "rows": values,
+        "rows_total": int(len(table)),
+    }
+
+
+#---------------------trends over the price history---------------------
+
+TREND_COLUMNS = ["market", "district", "variety", "grade", "latest_date", "latest_modal", "week_mean",
+                 "prev_week_mean", "week_over_week_pct", "volatility_pct", "days"]
+
+# Week-over-week change (%) below which a price counts as stable.
+STABLE_PCT = 2.0
+
+
+def _pct(new, old):
+    return np.where((old > 0) & ~np.isnan(old), (new - old) / old * 100.0, np.nan)
+
+
+def _num(value, digits=0):
+    return None if value is None or np.isnan(value) else float(np.round(value, digits))
+
+
+def _direction(change):
+    if change is None:
+        return None
+    return "rising" if change > STABLE_PCT else "falling" if change < -STABLE_PCT else "stable"
+
+
+def price_trend(data, series_names, window: int = 7, max_rows: int = None) -> dict:
+    """
+    Rolling mean, week-over-week change and volatility of a commodity's
+    history records (price_history.RECORD_DTYPE, sorted by day).
+
+    "overall" is computed on the daily median modal price across the matching
+    markets, "rows" per market / variety / grade. Volatility is the standard
+    deviation of the day-to-day modal price change, in percent.
+    """
+    df = pd.DataFrame({"day": data["day"], "series": data["series"], "modal": data["modal_price"].astype(np.float64)})
+    df = df[df["modal"].notna()]
+    if df.empty:
+        return {"unit": PRICE_UNIT, "overall": None, "daily": [], "columns": TREND_COLUMNS, "rows": [], "rows_total": 0}
+
+    last = int(df["day"].iloc[-1])
+    this_week = (df["day"] > last - 7).to_numpy()
+    prev_week = ((df["day"] > last - 14) & (df["day"] <= last - 7)).to_numpy()
+
+    # all markets: daily median, time-based rolling mean
+    daily = df.groupby("day")["modal"].median()
+    daily.index = pd.to_datetime(daily.index, unit="D")
+    rolling = daily.rolling(f"{window}D").mean()
+    days = (daily.index.values.astype("datetime64[D]").astype(np.int64))
+    week_mean = daily.to_numpy()[days > last - 7].mean()
+    prev = daily.to_numpy()[(days > last - 14) & (days <= last - 7)]
+    prev_mean = prev.mean() if len(prev) else np.nan
+    change = _num(_pct(week_mean, prev_mean), 1)
+    overall = {
+        "latest_date": str(daily.index[-1].date()),
+        "latest_median_modal": _num(daily.iloc[-1]),
+        "rolling_mean": _num(rolling.iloc[-1]),
+        "week_mean": _num(week_mean),
+        "prev_week_mean": _num(prev_mean),
+        "week_over_week_pct": change,
+        "volatility_pct": _num(daily.pct_change().std() * 100.0, 1),
+        "trend": _direction(change),
+        # a market with several varieties / grades is still one market
+        "markets": len({tuple(series_names(int(i))[f] for f in ("state", "district", "market"))
+                        for i in df["series"].unique()}),
+    }
+
+    # per market / variety / grade, all series at once
+    df["this"] = np.where(this_week, df["modal"], np.nan)
+    df["prev"] = np.where(prev_week, df["modal"], np.nan)
+    df["change"] = df.groupby("series")["modal"].pct_change()
+    per = df.groupby("series").agg(
+        latest_day=("day", "last"),
+        latest_modal=("modal", "last"),
+        week_mean=("this", "mean"),
+        prev_week_mean=("prev", "mean"),
+        volatility=("change", "std"),
+        days=("day", "size"),
+    )
+    per["wow"] = _pct(per["week_mean"].to_numpy(), per["prev_week_mean"].to_numpy())
+    per = per.sort_values("wow", ascending=False, na_position="last")
+
+    rows = []
+    for series_id, r in per.iterrows():
+        names = series_names(int(series_id))
+        rows.append([names["market"], names["district"], names["variety"], names.get("grade", ""),
+                     str(np.datetime64(int(r["latest_day"]), "D")), _num(r["latest_modal"]),
+                     _num(r["week_mean"]), _num(r["prev_week_mean"]),
+                     _num(r["wow"], 1), _num(r["volatility"] * 100.0, 1), int(r["days"])])
+
+    return {
+        "unit": PRICE_UNIT,
+        "window_days": window,
+        "overall": overall,
+        "daily": [[str(d.date()), _num(m), _num(r)] for d, m, r in zip(daily.index, daily.to_numpy(), rolling.to_numpy())],
+        "columns": TREND_COLUMNS,
+        "rows": rows[:max_rows] if max_rows else rows,
+        "rows_total": len(rows),
+    }
@@ -0,0 +1,250 @@
+import os
+import time
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from common.lru_cache import LRUCache
+from crop_price_tool.mandi_client import filter_params, iter_mandi_records, run_sync
+from crop_price_tool.price_history import get_price_history
+
+# Local SQLite copy of the data.gov.in mandi price resource.
+#
+# Mandi prices change once a day, so a daily job (ingest_mandi_prices.py)
+# pulls the whole resource in bulk and the price tool answers filters from
+# here in milliseconds. Only rows newer than the last snapshot are fetched
+# live, at most once per REMOTE_CHECK_TTL for the same filters, filtered by
+# arrival date on the server, and not at all while the snapshot is fresh.
+# Every write is also appended to the daily price history (price_history.py).
+
+STORE_PATH = os.path.join(".cache", "mandi_prices.sqlite")
+
+# Seconds before the same filters are checked against the live API again.
+REMOTE_CHECK_TTL = float(os.getenv("MANDI_REMOTE_CHECK_TTL", "3600"))
+# A snapshot ingested less than this many seconds ago needs no live check.
+SNAPSHOT_FRESH_SECONDS = float(os.getenv("MANDI_SNAPSHOT_FRESH_SECONDS", "86400"))
+# Live checks request at most this many recent arrival dates (one request
+# stream per date); anything older waits for the next bulk ingest.
+MAX_LIVE_DAYS = 3
+# Filter combinations whose last live check time is remembered.
+MAX_CHECKED_FILTERS = 4096
+
+INGEST_BATCH_SIZE = 5000
+
+KEY_FIELDS = ("state", "district", "market", "commodity", "variety", "grade")
+PRICE_FIELDS = ("min_price", "max_price", "modal_price")
+COLUMNS = KEY_FIELDS + ("arrival_date",) + PRICE_FIELDS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    state        TEXT COLLATE NOCASE NOT NULL,
+    district     TEXT COLLATE NOCASE NOT NULL,
+    market       TEXT COLLATE NOCASE NOT NULL,
+    commodity    TEXT COLLATE NOCASE NOT NULL,
+    variety      TEXT COLLATE NOCASE NOT NULL,
+    grade        TEXT COLLATE NOCASE NOT NULL,
+    arrival_date TEXT NOT NULL,              -- ISO yyyy-mm-dd
+    min_price    REAL,
+    max_price    REAL,
+    modal_price  REAL,
+    PRIMARY KEY (state, district, market, commodity, variety, grade, arrival_date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_prices_location
+    ON prices (state, district, market, commodity, arrival_date);
+-- state + commodity without district / market is the most common question
+CREATE INDEX IF NOT EXISTS idx_prices_state_commodity
+    ON prices (state, commodity, arrival_date);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def iso_date(value: str) -> str:
+    """'17/10/2026' (API format) -> '2026-10-17'; ISO dates pass through."""
+    value = (value or "").strip()
+    if "/" in value:
+        return datetime.strptime(value, "%d/%m/%Y").strftime("%Y-%m-%d")
+    return value
+
+
+def _price(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_row(record: dict) -> tuple:
+    """API record -> row tuple in COLUMNS order."""
+    keys = tuple((record.get(f) or "").strip() for f in KEY_FIELDS)
+    return keys + (iso_date(record.get("arrival_date")),) + tuple(_price(record.get(f)) for f in PRICE_FIELDS)
+
+
+class PriceStore:
+    """Indexed SQLite store of daily mandi prices, one connection per thread."""
+
+    def __init__(self, path: str = STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._checked = LRUCache(MAX_CHECKED_FILTERS)     # filter key -> time of the last live check
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    #---------------------meta---------------------
+
+    def get_meta(self, key: str):
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value):
+        with self._conn() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    @property
+    def snapshot_date(self):
+        """Latest arrival date of the last bulk snapshot (ISO), or None."""
+        return self.get_meta("snapshot_date")
+
+    def is_fresh(self) -> bool:
+        """True when the snapshot already covers today or was ingested within SNAPSHOT_FRESH_SECONDS."""
+        if (self.snapshot_date or "") >= date.today().isoformat():
+            return True
+        ingested_at = self.get_meta("ingested_at")
+        return bool(ingested_at) and time.time() - float(ingested_at) < SNAPSHOT_FRESH_SECONDS
+
+    #---------------------writes---------------------
+
+    def upsert(self, records) -> int:
+        """Insert or update API records (also appended to the history); returns the number of rows written."""
+        sql = f"INSERT OR REPLACE INTO prices ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        conn, written, batch = self._conn(), 0, []
+        history = get_price_history()
+        with conn:
+            for record in records:
+                batch.append(to_row(record))
+                if len(batch) >= INGEST_BATCH_SIZE:
+                    conn.executemany(sql, batch)
+                    history.append(dict(zip(COLUMNS, row)) for row in batch)
+                    written += len(batch)
+                    batch = []
+            if batch:
+                conn.executemany(sql, batch)
+                history.append(dict(zip(COLUMNS, row)) for row in batch)
+                written += len(batch)
+        return written
+
+    def ingest_snapshot(self) -> dict:
+        """Pull the full resource (all pages, concurrently) and store it as the new snapshot."""
+        started = time.time()
+
+        async def pull():
+            return [r async for r in iter_mandi_records({})]
+
+        records = run_sync(pull())
+        written = self.upsert(records)
+        latest = max((iso_date(r.get("arrival_date")) for r in records), default=None)
+        if latest:
+            self.set_meta("snapshot_date", latest)
+        self.set_meta("ingested_at", int(started))
+        with self._lock:
+            self._checked.clear()
+        return {"records": written, "snapshot_date": latest, "seconds": round(time.time() - started, 1)}
+
+    def rows(self, batch_size: int = INGEST_BATCH_SIZE):
+        """All stored rows as dicts, oldest first (used to backfill the history)."""
+        cursor = self._conn().execute(f"SELECT {', '.join(COLUMNS)} FROM prices ORDER BY arrival_date")
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                return
+            for row in batch:
+                yield dict(row)
+
+    #---------------------reads---------------------
+
+    def query(self, latest_only: bool = True, limit: int = None, **filters) -> list:
+        """
+        Rows matching {field: value} filters (case-insensitive), newest first.
+
+        With `latest_only`, only the most recent arrival date of every
+        (market, commodity, variety, grade) is returned.
+        """
+        where, args = [], []
+        for field, value in filters.items():
+            if value:
+                if field not in KEY_FIELDS:
+                    raise ValueError(f"Unknown mandi filter '{field}'.")
+                where.append(f"{field} = ?")
+                args.append(value.strip())
+        sql = f"SELECT {', '.join(COLUMNS)} FROM prices" + (" WHERE " + " AND ".join(where) if where else "")
+        if latest_only:
+            sql = (f"SELECT {', '.join(COLUMNS)} FROM ("
+                   f"SELECT *, MAX(arrival_date) OVER (PARTITION BY market, commodity, variety, grade) AS latest "
+                   f"FROM ({sql})) WHERE arrival_date = latest")
+        sql += " ORDER BY arrival_date DESC, market, commodity, variety"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [dict(row) for row in self._conn().execute(sql, args)]
+
+    def distinct_names(self) -> list:
+        """Distinct (state, district, market, commodity, variety) of the stored rows."""
+        sql = "SELECT DISTINCT state, district, market, commodity, variety FROM prices"
+        return [tuple(row) for row in self._conn().execute(sql)]
+
+    def refresh_from_remote(self, **filters) -> int:
+        """
+        Fetch live rows newer than the snapshot for these filters (at most once
+        per REMOTE_CHECK_TTL, never while the snapshot is fresh) and store them.
+        Returns the number of new rows.
+        """
+        if self.is_fresh():
+            return 0
+        key = tuple(sorted((f, v.strip().lower()) for f, v in filters.items() if v))
+        now = time.time()
+        with self._lock:
+            if now - self._checked.get(key, 0) < REMOTE_CHECK_TTL:
+                return 0
+            self._checked.put(key, now)
+
+        snapshot = self.snapshot_date or ""
+        today = date.today()
+        days = [today - timedelta(days=n) for n in range(MAX_LIVE_DAYS)]
+        days = [d for d in days if d.isoformat() > snapshot]
+
+        async def pull():
+            records = []
+            for day in days:
+                # the date filter is applied by the API; the predicate keeps old rows out regardless
+                params = filter_params(arrival_date=day.strftime("%d/%m/%Y"), **filters)
+                records.extend([r async for r in iter_mandi_records(
+                    params, predicate=lambda r: iso_date(r.get("arrival_date")) > snapshot)])
+            return records
+
+        try:
+            return self.upsert(run_sync(pull()))
+        except Exception:
+            self._checked.put(key, 0)  # retry on the next call
+            raise
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_price_store() -> PriceStore:
+    """Process-wide mandi price store (created on first use)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PriceStore()
+    return _store
@@ -0,0 +1,79 @@
+import json
+from datetime import date, timedelta
+from crop_price_tool.mandi_vocabulary import get_mandi_vocabulary
+from crop_price_tool.price_history import get_price_history
+from crop_price_tool.price_stats import price_trend
+
+# "Are onion prices going up?" is answered from the local daily price
+# history (price_history.py), which every store update appends to, so a
+# trend over weeks costs one range read instead of one API call per day.
+
+
+def get_price_trend_tool(
+    commodity: str,
+    state: str = None,
+    district: str = None,
+    market: str = None,
+    variety: str = None,
+    days: int = 30,
+    window: int = 7,
+    limit: int = 20
+) -> str:
+
+    """
+    Shows how the mandi price of a crop has moved recently: rolling average, week-over-week change and volatility.
+    Use it for questions like "are onion prices going up?" or "how did wheat prices change this month?".
+
+    Args:
+    Required:
+        commodity: The name of the crop, e.g. "Onion". (Required)
+
+    Optional:
+        state:  State to restrict the markets to; taken from the district / market if omitted. (Optional)
+        district:  District to restrict the markets to. (Optional)
+        market:  A single market. (Optional)
+        variety:  Crop variety. (Optional)
+        days:  How many days of history to look at. Default is 30. (Optional)
+        window:  Rolling average window in days. Default is 7. (Optional)
+        limit:  Maximum number of per-market rows to return. Default is 20. (Optional)
+
+    Returns:
+        A JSON string, prices in Rs/quintal:
+        {"commodity", "from", "to", "unit", "window_days",
+         "overall": {latest_date, latest_median_modal, rolling_mean, week_mean, prev_week_mean,
+                     week_over_week_pct, volatility_pct, trend ("rising" / "falling" / "stable"), markets},
+         "daily": [[date, median_modal, rolling_mean], ...],
+         "columns": [market, district, variety, grade, latest_date, latest_modal, week_mean, prev_week_mean,
+                     week_over_week_pct, volatility_pct, days],
+         "rows": [[...], ...], "rows_total": int}
+    """
+
+    print('PRICE TREND TOOL CALLED!')
+    vocabulary = get_mandi_vocabulary()
+    if vocabulary is not None:
+        try:
+            names = vocabulary.normalize_filters(state, district=district, market=market,
+                                                 commodity=commodity, variety=variety)
+            state, district, market, commodity, variety = (names[f] for f in
+                                                           ("state", "district", "market", "commodity", "variety"))
+        except ValueError as e:
+            return str(e)
+
+    history = get_price_history()
+    end = history.last_day(commodity)
+    if end is None:
+        return f"No price history found for '{commodity}'."
+    start = (date.fromisoformat(end) - timedelta(days=max(int(days), 14) - 1)).isoformat()
+
+    data = history.read(commodity, start=start, end=end,
+                        state=state, district=district, market=market, variety=variety)
+    if not len(data):
+        return f"No price history found for '{commodity}' with these filters between {start} and {end}."
+
+    trend = price_trend(data, history.series, window=int(window), max_rows=limit)
+    return json.dumps(dict(commodity=commodity, **{"from": start, "to": end}, **trend),
+                      ensure_ascii=False, separators=(",", ":"))
+
+
+# if __name__ == "__main__":
+#     print(get_price_trend_tool("Onion", state="Maharashtra"))
@@ -0,0 +1,98 @@
+import warnings
+import numpy as np
+
+# Windowed aggregation of hourly forecast arrays.
+#
+# Every variable has its own reducer(s): rain and evapotranspiration are
+# summed over the window (picking one hour in three loses the rain that fell
+# in between), temperature keeps its extremes, soil state is averaged.
+# Variables with more than one reducer come out as <variable>_<reducer>.
+
+REDUCERS = {
+    "temperature_2m": ("max", "min"),
+    "relative_humidity_2m": ("mean",),
+    "evapotranspiration": ("sum",),
+    "soil_temperature_0cm": ("mean",),
+    "soil_temperature_6cm": ("mean",),
+    "soil_temperature_18cm": ("mean",),
+    "precipitation": ("sum",),
+    "precipitation_probability": ("max",),
+    "soil_moisture_0_to_1cm": ("mean",),
+    "soil_moisture_1_to_3cm": ("mean",),
+    "soil_moisture_3_to_9cm": ("mean",),
+    "soil_moisture_9_to_27cm": ("mean",),
+    "wind_speed_10m": ("max",),
+}
+
+WINDOW_HOURS = (1, 3, 6, 24)
+
+_FUNCS = {
+    "sum": np.nansum,
+    "mean": np.nanmean,
+    "max": np.nanmax,
+    "min": np.nanmin,
+}
+
+
+def output_names(variable: str, window_hours: int) -> list:
+    """Names `variable` is reported under after aggregation to `window_hours`."""
+    reducers = REDUCERS.get(variable, ("mean",))
+    if window_hours == 1 or len(reducers) == 1:
+        return [variable]
+    return [f"{variable}_{r}" for r in reducers]
+
+
+def base_variable(name: str) -> str:
+    """Inverse of `output_names`: temperature_2m_max -> temperature_2m."""
+    if name in REDUCERS:
+        return name
+    head, _, tail = name.rpartition("_")
+    return head if tail in _FUNCS and head in REDUCERS else name
+
+
+def aggregate(times: np.ndarray, columns: dict, window_hours: int, interval: int = 3600):
+    """
+    Reduce hourly arrays to `window_hours` windows.
+
+    Parameters
+    ----------
+    times : np.ndarray
+        Epoch seconds of every input step (window starts are taken from it).
+    columns : dict
+        variable -> 1-D array aligned with `times`.
+    window_hours : int
+        One of WINDOW_HOURS; 24 gives daily values (windows start at the
+        first step, which Open-Meteo aligns to local midnight).
+    interval : int
+        Seconds between input steps.
+
+    Returns
+    -------
+    (np.ndarray, dict)
+        Window start times and {output name: reduced array}.
+    """
+    if window_hours not in WINDOW_HOURS:
+        raise ValueError(f"Unsupported window of {window_hours} hours, use one of {WINDOW_HOURS}.")
+
+    steps = max(1, window_hours * 3600 // int(interval))
+    if steps == 1:
+        return times, dict(columns)
+
+    n = len(times)
+    n_windows = -(-n // steps)
+    pad = n_windows * steps - n
+
+    out = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN windows stay NaN
+        for var, values in columns.items():
+            block = np.asarray(values, dtype=np.float32)
+            if pad:
+                block = np.concatenate([block, np.full(pad, np.nan, dtype=np.float32)])
+            block = block.reshape(n_windows, steps)
+            for name, reducer in zip(output_names(var, window_hours), REDUCERS.get(var, ("mean",))):
+                reduced = _FUNCS[reducer](block, axis=1)
+                if reducer == "sum":
+                    reduced[np.isnan(block).all(axis=1)] = np.nan
+                out[name] = reduced
+    return times[::steps], out
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+from open_meteo_weather_tool.weather_store import get_weather_store
+from open_meteo_weather_tool.weather_tool import _ensure_fresh
+
+# Farm indicators computed from the cached hourly forecast, so the agent
+# gets a few numbers per day instead of 13 raw series to reason over.
+
+# Spraying: wind below this (km/h, Open-Meteo's default unit), no rain in
+# the hour and a low rain chance, during daylight, for at least MIN_SPRAY_HOURS.
+SPRAY_MAX_WIND = 15.0
+SPRAY_MAX_RAIN_PROBABILITY = 40.0
+SPRAY_DAYLIGHT = (6, 19)
+MIN_SPRAY_HOURS = 2
+
+HEAT_STRESS_TEMPERATURE = 35.0
+GDD_UPPER_TEMPERATURE = 30.0
+
+_VARIABLES = ["temperature_2m", "evapotranspiration", "precipitation",
+              "precipitation_probability", "wind_speed_10m", "soil_temperature_0cm"]
+
+
+def _runs(mask: np.ndarray):
+    """(start, end) index pairs of consecutive True runs in a 1-D mask."""
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1))
+
+
+def _frost_risk(tmin, soil_min):
+    if tmin <= 2 or soil_min <= 0:
+        return "high"
+    if tmin <= 4:
+        return "moderate"
+    return "low"
+
+
+def get_agro_weather_summary(city_name: str, base_temperature: float = 10.0):
+    """
+    Daily farm weather indicators for a city for the next 3 days.
+
+    Parameters
+    ----------
+    city_name : str
+        Name of the Indian city / town.
+    base_temperature : float
+        Base temperature (°C) of the crop for growing degree days
+        (10 for maize / rice / cotton, 5 for wheat / mustard).
+
+    Returns
+    -------
+    dict
+        {"city", "base_temperature", "days": [...]} where every day has:
+
+    - date: local date.
+    - temperature_max / temperature_min (°C).
+    - growing_degree_days: max(0, mean(Tmax capped at 30, Tmin) - base) — crop development that day.
+    - rain_mm / evapotranspiration_mm: daily totals.
+    - water_deficit_mm: evapotranspiration minus rain; positive means the field is losing water (irrigation need).
+    - spray_windows: local time ranges with low wind, no rain and low rain chance in daylight — safe for pesticide spraying.
+    - heat_stress_hours: hours at or above 35 °C.
+    - frost_risk: "low", "moderate" or "high" from minimum air and soil surface temperature.
+    """
+    print("USING AGRO WEATHER SUMMARY!")
+
+    store = get_weather_store()
+    key = _ensure_fresh(city_name)
+    entry = store.entry(key)
+    data = store.read(key, _VARIABLES)
+
+    times = store.times(key) + entry.get("utc_offset", 0)
+    n_days = len(times) // 24
+    n = n_days * 24
+
+    def days(var):
+        return np.asarray(data[var][:n], dtype=np.float64).reshape(n_days, 24)
+
+    temp = days("temperature_2m")
+    rain = days("precipitation")
+    et = days("evapotranspiration")
+    tmax = np.nanmax(temp, axis=1)
+    tmin = np.nanmin(temp, axis=1)
+    gdd = np.maximum(0.0, (np.minimum(tmax, GDD_UPPER_TEMPERATURE) + tmin) / 2 - base_temperature)
+    rain_total = np.nansum(rain, axis=1)
+    et_total = np.nansum(et, axis=1)
+    heat_hours = (temp >= HEAT_STRESS_TEMPERATURE).sum(axis=1)
+    soil_min = np.nanmin(days("soil_temperature_0cm"), axis=1)
+
+    hour = ((times[:n] // 3600) % 24).reshape(n_days, 24)
+    sprayable = ((days("wind_speed_10m") < SPRAY_MAX_WIND)
+                 & (rain == 0)
+                 & (days("precipitation_probability") < SPRAY_MAX_RAIN_PROBABILITY)
+                 & (hour >= SPRAY_DAYLIGHT[0]) & (hour < SPRAY_DAYLIGHT[1]))
+
+    dates = pd.to_datetime(times[:n:24], unit="s").strftime("%Y-%m-%d")
+    summary = []
+    for d in range(n_days):
+        windows = [f"{hour[d, s]:02d}:00-{hour[d, e - 1] + 1:02d}:00"
+                   for s, e in _runs(sprayable[d]) if e - s >= MIN_SPRAY_HOURS]
+        summary.append({
+            "date": dates[d],
+            "temperature_max": round(float(tmax[d]), 1),
+            "temperature_min": round(float(tmin[d]), 1),
+            "growing_degree_days": round(float(gdd[d]), 1),
+            "rain_mm": round(float(rain_total[d]), 1),
+            "evapotranspiration_mm": round(float(et_total[d]), 1),
+            "water_deficit_mm": round(float(et_total[d] - rain_total[d]), 1),
+            "spray_windows": windows,
+            "heat_stress_hours": int(heat_hours[d]),
+            "frost_risk": _frost_risk(tmin[d], soil_min[d]),
+        })
+
+    return {"city": city_name, "base_temperature": base_temperature, "days": summary}
@@ -0,0 +1,100 @@
+import os
+import csv
+import json
+import threading
+from common.fuzzy_index import FuzzyIndex, same_shape
+
+# Offline city -> (lat, lon) resolution for the weather tool.
+#
+# The bundled data/india_places.csv covers state capitals, district HQs and
+# the big mandi towns. Places only Nominatim knows about are appended to
+# LEARNED_FILE so they are answered locally from then on.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PLACES_FILE = os.path.join(BASE_DIR, "data", "india_places.csv")
+LEARNED_FILE = os.path.join(".cache", "gazetteer_learned.jsonl")
+
+# Fuzzy matches below this score fall through to Nominatim. Typo matches
+# must also keep the query's shape (fuzzy_index.same_shape): a wrong town
+# nearby in spelling is worse than one Nominatim call.
+FUZZY_CUTOFF = 0.9
+
+# Words users tack onto place names that are not part of the name.
+_NOISE_WORDS = {"city", "district", "dist", "town", "village", "tehsil", "india"}
+
+
+class Gazetteer:
+    """In-memory index of Indian places keyed by name and aliases."""
+
+    def __init__(self, places_file: str = PLACES_FILE, learned_file: str = LEARNED_FILE):
+        self.learned_file = learned_file
+        self.places = []
+        self.index = FuzzyIndex()
+        self._write_lock = threading.Lock()
+
+        with open(places_file, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                aliases = [a for a in (row.pop("aliases") or "").split("|") if a]
+                self._add(row, aliases)
+
+        if os.path.exists(learned_file):
+            with open(learned_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._add(json.loads(line), [])
+
+    def _add(self, place: dict, aliases: list):
+        place = dict(place, lat=float(place["lat"]), lon=float(place["lon"]))
+        self.places.append(place)
+        self.index.add(place["name"], place)
+        for alias in aliases:
+            self.index.add(alias, place)
+        # "Nashik, Maharashtra" style queries
+        if place.get("state"):
+            self.index.add(f"{place['name']} {place['state']}", place)
+        return place
+
+    def lookup(self, name: str, cutoff: float = FUZZY_CUTOFF):
+        """
+        Resolve a place name to a place dict ({name, district, state, lat, lon, kind}).
+
+        Exact and case-insensitive names are answered first, then
+        transliteration variants and typos with the same first sound and
+        syllable count. Returns None if nothing qualifies above `cutoff`.
+        """
+        words = [w for w in name.replace(",", " ").split() if w.lower() not in _NOISE_WORDS]
+        query = " ".join(words) or name
+        for place, matched, score in self.index.search(query, limit=3, cutoff=cutoff):
+            if score == 1.0 or same_shape(query, matched):
+                return dict(place, matched=matched, score=score)
+        return None
+
+    def learn(self, name: str, lat: float, lon: float, **extra):
+        """Add a place resolved elsewhere (Nominatim) and persist it."""
+        place = {"name": name, "district": extra.get("district", ""), "state": extra.get("state", ""),
+                 "lat": float(lat), "lon": float(lon), "kind": extra.get("kind", "learned")}
+        with self._write_lock:
+            self._add(place, [])
+            os.makedirs(os.path.dirname(self.learned_file) or ".", exist_ok=True)
+            with open(self.learned_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(place, ensure_ascii=False) + "\n")
+        return place
+
+    def in_state(self, state: str) -> list:
+        """All places of a state (case-insensitive)."""
+        state = state.lower()
+        return [p for p in self.places if p.get("state", "").lower() == state]
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer:
+    """Process-wide gazetteer, loaded on first use."""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = Gazetteer()
+    return _gazetteer
@@ -0,0 +1,101 @@
+import os
+import asyncio
+import threading
+import weakref
+import niquests  # ships with openmeteo-requests >= 1.4
+import openmeteo_requests
+import requests_cache
+from requests.adapters import HTTPAdapter
+from retry_requests import retry
+
+# One Open-Meteo client per process. Building a CachedSession opens the
+# SQLite cache and every new session starts with an empty connection pool,
+# so creating them per fetch paid for SQLite + TCP + TLS setup on each miss.
+
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+
+HTTP_CACHE_NAME = ".cache"
+HTTP_CACHE_EXPIRE = 3600
+
+# Upper bound of keep-alive connections held open to api.open-meteo.com.
+# Every worker thread that misses the cache at the same time needs one.
+POOL_MAXSIZE = int(os.getenv("OPEN_METEO_POOL_MAXSIZE", "16"))
+REQUEST_TIMEOUT = float(os.getenv("OPEN_METEO_TIMEOUT", "10"))
+
+_client = None
+_client_lock = threading.Lock()
+
+_async_clients = weakref.WeakKeyDictionary()
+_async_lock = threading.Lock()
+
+
+#---------------------sync client (shared across threads)---------------------
+
+def _build_session():
+    """CachedSession with retries and a pooled keep-alive adapter."""
+    cache_session = requests_cache.CachedSession(HTTP_CACHE_NAME, expire_after=HTTP_CACHE_EXPIRE)
+    retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
+
+    # retry() mounts a default sized adapter; swap in a bigger pool that keeps
+    # the same retry policy so concurrent callers do not open and drop sockets.
+    for prefix in ("http://", "https://"):
+        max_retries = retry_session.get_adapter(prefix).max_retries
+        retry_session.mount(prefix, HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=POOL_MAXSIZE,
+            max_retries=max_retries,
+        ))
+    return retry_session
+
+
+def get_openmeteo_client():
+    """Return the process-wide Open-Meteo client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = openmeteo_requests.Client(session=_build_session())
+    return _client
+
+
+def weather_api(params: dict, url: str = OPEN_METEO_URL):
+    """Call the Open-Meteo forecast endpoint through the shared client."""
+    return get_openmeteo_client().weather_api(url, params=params, timeout=REQUEST_TIMEOUT)
+
+
+#---------------------async client (one per event loop)---------------------
+
+def get_async_openmeteo_client():
+    """
+    Return the Open-Meteo async client bound to the running event loop.
+
+    Async sessions keep their connections on the loop they were created on,
+    so clients are cached per loop instead of globally.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        with _async_lock:
+            client = _async_clients.get(loop)
+            if client is None:
+                session = niquests.AsyncSession(
+                    retries=5,
+                    pool_connections=4,
+                    pool_maxsize=POOL_MAXSIZE,
+                    timeout=REQUEST_TIMEOUT,
+                )
+                client = openmeteo_requests.AsyncClient(session=session)
+                _async_clients[loop] = client
+    return client
+
+
+async def weather_api_async(params: dict, url: str = OPEN_METEO_URL):
+    """Async counterpart of `weather_api`."""
+    return await get_async_openmeteo_client().weather_api(url, params=params)
+
+
+async def close_async_clients():
+    """Close the async session of the running loop (call on app shutdown)."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and client._session is not None:
+        await client._session.close()
@@ -0,0 +1,52 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Deduplicates concurrent work on the same key: the first caller runs the
+# function, everybody else asking for the same key while it runs waits for
+# (or just gets) that same result instead of repeating the work.
+
+
+class SingleFlight:
+    """Run at most one call per key at a time, in the caller or in the background."""
+
+    def __init__(self, max_workers: int = 4):
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="single-flight")
+
+    def _claim(self, key):
+        """Return (future, owner): owner is True if the caller must run the work."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def _run(self, key, future, fn, args, kwargs):
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run `fn` for `key` (or join the run already in flight) and return its result."""
+        future, owner = self._claim(key)
+        if owner:
+            self._run(key, future, fn, args, kwargs)
+        return future.result()
+
+    def do_background(self, key, fn, *args, **kwargs) -> Future:
+        """Start `fn` for `key` on the worker pool unless it is already in flight."""
+        future, owner = self._claim(key)
+        if owner:
+            self._executor.submit(self._run, key, future, fn, args, kwargs)
+        return future
+
+    def in_flight(self, key) -> bool:
+        with self._lock:
+            return key in self._inflight
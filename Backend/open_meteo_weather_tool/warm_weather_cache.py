@@ -0,0 +1,34 @@
+import argparse
+from open_meteo_weather_tool.gazetteer import get_gazetteer
+from open_meteo_weather_tool.weather_tool import warm_weather_cache
+
+# Pre-fill the weather cache before the morning traffic peak, e.g. from cron:
+#
+#   cd Backend && python -m open_meteo_weather_tool.warm_weather_cache --state "Madhya Pradesh"
+#   cd Backend && python -m open_meteo_weather_tool.warm_weather_cache --district Nashik Pune Indore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm the weather cache with bulk Open-Meteo requests.")
+    parser.add_argument("places", nargs="*", help="Place names to warm.")
+    parser.add_argument("--state", action="append", default=[], help="Warm every gazetteer place of this state.")
+    parser.add_argument("--district", action="append", default=[], help="Warm every gazetteer place of this district.")
+    parser.add_argument("--force", action="store_true", help="Refetch cells that are still fresh.")
+    args = parser.parse_args()
+
+    gazetteer = get_gazetteer()
+    places = list(args.places)
+    for state in args.state:
+        places += [p["name"] for p in gazetteer.in_state(state)]
+    for district in args.district:
+        places += [p["name"] for p in gazetteer.places if p.get("district", "").lower() == district.lower()]
+
+    if not places:
+        parser.error("nothing to warm: pass place names, --state or --district")
+
+    summary = warm_weather_cache(places, force=args.force)
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
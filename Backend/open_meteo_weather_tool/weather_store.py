@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import threading
+import numpy as np
+
+# Columnar cache for weather forecasts of all locations.
+#
+# Layout of STORE_DIR:
+#   meta.json       schema (variables, n_steps, capacity) + one entry per key
+#                   {row, timestamp, start, interval, length, ...} + an alias
+#                   table {place name: key}
+#   <variable>.npy  float32 matrix of shape (capacity, n_steps), memory-mapped
+#
+# A location is one row, a variable is one file, so reading a single
+# variable for a single city touches n_steps * 4 bytes instead of parsing
+# a JSON file with every variable in it.
+
+STORE_DIR = os.path.join(".cache", "weather_store")
+STORE_VERSION = 2
+INITIAL_CAPACITY = 256
+
+
+class WeatherStore:
+    """Memory-mapped, column-per-variable forecast cache keyed by location."""
+
+    def __init__(self, store_dir: str = STORE_DIR):
+        self.store_dir = store_dir
+        self.meta_path = os.path.join(store_dir, "meta.json")
+        self._lock = threading.RLock()
+        self._columns = {}
+        self._meta_mtime = None
+        self.meta = None
+        self._load_meta()
+
+    #---------------------schema / files---------------------
+
+    def _load_meta(self):
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r") as f:
+                meta = json.load(f)
+            if meta.get("version") == STORE_VERSION:
+                self.meta = meta
+                self._meta_mtime = os.path.getmtime(self.meta_path)
+                self._columns = {}
+                return
+        self.meta = None
+
+    def _maybe_reload(self):
+        # Another worker process may have written rows since we loaded meta.
+        try:
+            mtime = os.path.getmtime(self.meta_path)
+        except FileNotFoundError:
+            return
+        if mtime != self._meta_mtime:
+            with self._lock:
+                self._load_meta()
+
+    def _save_meta(self):
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, self.meta_path)
+        self._meta_mtime = os.path.getmtime(self.meta_path)
+
+    def _column_path(self, variable):
+        return os.path.join(self.store_dir, f"{variable}.npy")
+
+    def _column(self, variable):
+        col = self._columns.get(variable)
+        if col is None:
+            col = np.load(self._column_path(variable), mmap_mode="r+")
+            self._columns[variable] = col
+        return col
+
+    def _create(self, variables, n_steps):
+        os.makedirs(self.store_dir, exist_ok=True)
+        self.meta = {"version": STORE_VERSION, "variables": list(variables), "n_steps": n_steps,
+                     "capacity": INITIAL_CAPACITY, "keys": {}, "aliases": {}}
+        self._columns = {}
+        for var in variables:
+            col = np.lib.format.open_memmap(self._column_path(var), mode="w+", dtype=np.float32,
+                                            shape=(INITIAL_CAPACITY, n_steps))
+            col[:] = np.nan
+            col.flush()
+        self._save_meta()
+
+    def _grow(self):
+        capacity = self.meta["capacity"]
+        new_capacity = capacity * 2
+        for var in self.meta["variables"]:
+            old = self._column(var)
+            tmp_path = self._column_path(var) + ".tmp"
+            new = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32,
+                                            shape=(new_capacity, self.meta["n_steps"]))
+            new[:capacity] = old
+            new[capacity:] = np.nan
+            new.flush()
+            del new
+            self._columns.pop(var, None)
+            del old
+            os.replace(tmp_path, self._column_path(var))
+        self.meta["capacity"] = new_capacity
+
+    #---------------------public API---------------------
+
+    def __contains__(self, key):
+        self._maybe_reload()
+        return self.meta is not None and key in self.meta["keys"]
+
+    def entry(self, key):
+        """Metadata of a cached location (timestamp, start, interval, ...) or None."""
+        self._maybe_reload()
+        if self.meta is None:
+            return None
+        return self.meta["keys"].get(key)
+
+    def put(self, key, start: int, interval: int, columns: dict, **info):
+        """
+        Write (or overwrite) the forecast of one location.
+
+        `columns` maps variable -> 1-D array; `start` / `interval` are epoch
+        seconds of the first step and the step length.
+        """
+        self.put_many([(key, start, interval, columns, info)])
+
+    def put_many(self, items):
+        """
+        Write several forecasts with one metadata save.
+
+        `items` is an iterable of (key, start, interval, columns, info) tuples.
+        """
+        with self._lock:
+            self._maybe_reload()
+            for key, start, interval, columns, info in items:
+                self._put_row(key, start, interval, columns, info)
+            for col in self._columns.values():
+                col.flush()
+            self._save_meta()
+
+    def _put_row(self, key, start, interval, columns, info):
+        length = max(len(v) for v in columns.values())
+        if self.meta is None or set(columns) - set(self.meta["variables"]):
+            self._create(columns.keys(), length)
+
+        n_steps = self.meta["n_steps"]
+        entry = self.meta["keys"].get(key)
+        if entry is None:
+            row = len(self.meta["keys"])
+            if row >= self.meta["capacity"]:
+                self._grow()
+        else:
+            row = entry["row"]
+
+        for var in self.meta["variables"]:
+            col = self._column(var)
+            values = np.asarray(columns.get(var, ()), dtype=np.float32)[:n_steps]
+            col[row, :len(values)] = values
+            col[row, len(values):] = np.nan
+
+        self.meta["keys"][key] = dict(info, row=row, timestamp=time.time(), start=int(start),
+                                      interval=int(interval), length=min(length, n_steps))
+
+    def read(self, key, variables=None) -> dict:
+        """
+        Return {variable: 1-D float32 view} for one location.
+
+        The arrays are views into the memory-mapped columns; only the
+        requested variables are touched.
+        """
+        entry = self.entry(key)
+        if entry is None:
+            raise KeyError(key)
+        if variables is None:
+            variables = self.meta["variables"]
+        row, length = entry["row"], entry["length"]
+        out = {}
+        for var in variables:
+            if var not in self.meta["variables"]:
+                raise ValueError(f"Variable '{var}' not found in weather data.")
+            out[var] = self._column(var)[row, :length]
+        return out
+
+    def alias(self, name):
+        """Key a place name was last resolved to, or None."""
+        self._maybe_reload()
+        if self.meta is None:
+            return None
+        return self.meta.get("aliases", {}).get(name)
+
+    def set_alias(self, name, key):
+        """Remember that place `name` maps to store `key`."""
+        self.set_aliases({name: key})
+
+    def set_aliases(self, aliases: dict):
+        """Record several {place name: key} aliases with one metadata save."""
+        with self._lock:
+            self._maybe_reload()
+            if self.meta is None:
+                return  # nothing cached yet; recorded on the next call
+            table = self.meta.setdefault("aliases", {})
+            changed = {name: key for name, key in aliases.items() if table.get(name) != key}
+            if changed:
+                table.update(changed)
+                self._save_meta()
+
+    def times(self, key) -> np.ndarray:
+        """Epoch seconds (int64) of every step cached for `key`."""
+        entry = self.entry(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry["start"] + np.arange(entry["length"], dtype=np.int64) * entry["interval"]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_weather_store() -> WeatherStore:
+    """Process-wide weather store, opened on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = WeatherStore()
+    return _store
@@ -1,32 +1,66 @@
 import os
-import json
 import time
-import openmeteo_requests
+from typing import Optional
+from datetime import timedelta, timezone
 import requests
+import numpy as np
 import pandas as pd
-import requests_cache
-from retry_requests import retry
+from open_meteo_weather_tool.openmeteo_client import weather_api, weather_api_async
+from open_meteo_weather_tool.gazetteer import get_gazetteer
+from open_meteo_weather_tool.weather_store import get_weather_store
+from open_meteo_weather_tool.single_flight import SingleFlight
+from open_meteo_weather_tool.aggregation import aggregate, base_variable
+from common.fuzzy_index import normalize
 
 ##chages:
 # 1. added time interval for weather api
 # 2. added variable query for weather data to fetech data for a specific variable
+# 3. Open-Meteo client is created once per process (openmeteo_client.py) instead of per fetch
+# 4. city -> lat/lon comes from the offline gazetteer, Nominatim is only the fallback
+# 5. forecasts are cached in one columnar store (.cache/weather_store) instead of .cache/<city>.json
+# 6. cache keys are forecast grid cells, place names map to cells through an alias table
+# 7. stale-while-revalidate with one in-flight refresh per cell, TTLs configurable via env
+# 8. hourly data is cached, windows (1/3/6/24 h) are aggregated per variable on read
+# 9. several variables and a time window (start/end or next N hours) in one query
 
 
 #---------------------function to get latitude and longitude from city name---------------------
 
 def get_lat_lon_from_city(city_name):
+    """
+    Get latitude and longitude for a given city name.
+
+    Answered from the offline gazetteer (exact, case-insensitive and fuzzy
+    matches); only unknown places go to the Nominatim API, and those results
+    are written back into the gazetteer.
+    """
+    gazetteer = get_gazetteer()
+    place = gazetteer.lookup(city_name)
+    if place is not None:
+        print(f"GAZETTEER HIT: {city_name} -> {place['name']} ({place['score']})")
+        return place["lat"], place["lon"]
+
+    lat, lon, address = get_lat_lon_from_nominatim(city_name)
+    gazetteer.learn(city_name, lat, lon,
+                    district=address.get("county") or address.get("state_district", ""),
+                    state=address.get("state", ""))
+    return lat, lon
+
+
+def get_lat_lon_from_nominatim(city_name):
     """Get latitude and longitude for a given city name using Nominatim API."""
     url = "https://nominatim.openstreetmap.org/search"
     params = {
         'q': f"{city_name}, India",
         'format': 'json',
+        'addressdetails': 1,
         'limit': 1
     }
     headers = {
         'User-Agent': 'Mozilla/5.0 (compatible; MyWeatherApp/1.0; contact@example.com)'
     }
     
-    response = requests.get(url, params=params, headers=headers)
+    response = requests.get(url, params=params, headers=headers, timeout=10)
     
     # Check if response is valid
     if response.status_code != 200:
@@ -38,9 +72,9 @@ def get_lat_lon_from_city(city_name):
     if not data:
         raise ValueError(f"City '{city_name}' not found.")
     
-    lat = data[0]['lat']
-    lon = data[0]['lon']
-    return lat, lon
+    lat = float(data[0]['lat'])
+    lon = float(data[0]['lon'])
+    return lat, lon, data[0].get('address', {})
 
 
 #---------------------function to fetch weather data---------------------
@@ -87,86 +121,322 @@ def get_lat_lon_from_city(city_name):
 #     return weather_json
 
 
-def fetch_weather_from_api(lat, lon, step_hours: int = 3):
-    """Fetch weather data from Open-Meteo API, downsample to N hours if needed."""
-    cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
-    retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
-    openmeteo = openmeteo_requests.Client(session=retry_session)
+HOURLY_VARIABLES = [
+    "temperature_2m", "relative_humidity_2m", "evapotranspiration",
+    "soil_temperature_0cm", "soil_temperature_6cm", "soil_temperature_18cm",
+    "precipitation", "precipitation_probability",
+    "soil_moisture_0_to_1cm", "soil_moisture_1_to_3cm",
+    "soil_moisture_3_to_9cm", "soil_moisture_9_to_27cm",
+    "wind_speed_10m"
+]
 
-    url = "https://api.open-meteo.com/v1/forecast"
-    params = {
+
+def _forecast_params(lat, lon):
+    return {
         "latitude": lat,
         "longitude": lon,
-        "hourly": [
-            "temperature_2m", "relative_humidity_2m", "evapotranspiration",
-            "soil_temperature_0cm", "soil_temperature_6cm", "soil_temperature_18cm",
-            "precipitation", "precipitation_probability",
-            "soil_moisture_0_to_1cm", "soil_moisture_1_to_3cm",
-            "soil_moisture_3_to_9cm", "soil_moisture_9_to_27cm",
-            "wind_speed_10m"
-        ],
+        "hourly": HOURLY_VARIABLES,
         "forecast_days": 3,
         "timezone": "auto"
     }
 
-    responses = openmeteo.weather_api(url, params=params)
-    response = responses[0]
+
+def _response_to_arrays(response):
+    """Convert one Open-Meteo response to (start, interval, {variable: float32 array}, utc_offset), hourly."""
     hourly = response.Hourly()
 
-    variables = {}
-    for idx, var_name in enumerate(params["hourly"]):
-        variables[var_name] = hourly.Variables(idx).ValuesAsNumpy().tolist()
+    columns = {}
+    for idx, var_name in enumerate(HOURLY_VARIABLES):
+        columns[var_name] = hourly.Variables(idx).ValuesAsNumpy().astype(np.float32)
+
+    return hourly.Time(), hourly.Interval(), columns, response.UtcOffsetSeconds()
+
+
+def _to_json(times, columns, utc_offset: int = 0, daily: bool = False):
+    """Build the tool output ({"date": [...], variable: [...]}) from cached arrays."""
+    if daily:
+        # daily windows start at local midnight, label them with the local date
+        dates = pd.to_datetime(times + utc_offset, unit="s").strftime("%Y-%m-%d").tolist()
+    else:
+        # local wall-clock time with its offset, e.g. "2025-08-18 06:00:00+05:30"
+        tz = timezone(timedelta(seconds=int(utc_offset)))
+        dates = pd.to_datetime(times, unit="s", utc=True).tz_convert(tz).astype(str).tolist()
+    weather_json = {"date": dates}
+    for k, v in columns.items():
+        weather_json[k] = np.round(np.asarray(v, dtype=np.float64), 2).tolist()
+    return weather_json
+
 
-    timestamps = pd.date_range(
-        start=pd.to_datetime(hourly.Time(), unit="s", utc=True),
-        end=pd.to_datetime(hourly.TimeEnd(), unit="s", utc=True),
-        freq=pd.Timedelta(seconds=hourly.Interval()),
-        inclusive="left"
-    ).astype(str).tolist()
+def _aggregated_json(times, columns, step_hours: int, interval: int = 3600, utc_offset: int = 0):
+    """Aggregate hourly arrays to `step_hours` windows and build the tool output."""
+    times, columns = aggregate(times, columns, step_hours, interval)
+    return _to_json(times, columns, utc_offset, daily=step_hours == 24)
 
-    # ---- Downsample here ----
-    step = step_hours  # e.g. 3 or 6
-    indices = list(range(0, len(timestamps), step))
 
-    weather_json = {"date": [timestamps[i] for i in indices]}
-    for k, v in variables.items():
-        weather_json[k] = [v[i] for i in indices]
+def _response_to_json(response, step_hours: int = 3):
+    start, interval, columns, utc_offset = _response_to_arrays(response)
+    times = start + np.arange(len(next(iter(columns.values())))) * interval
+    return _aggregated_json(times, columns, step_hours, interval, utc_offset)
 
-    return weather_json
+
+def fetch_weather_from_api(lat, lon, step_hours: int = 3):
+    """Fetch weather data from Open-Meteo API, aggregated to N-hour windows (1, 3, 6 or 24)."""
+    responses = weather_api(_forecast_params(lat, lon))
+    return _response_to_json(responses[0], step_hours)
+
+
+async def fetch_weather_from_api_async(lat, lon, step_hours: int = 3):
+    """Async variant of `fetch_weather_from_api` using the pooled async client."""
+    responses = await weather_api_async(_forecast_params(lat, lon))
+    return _response_to_json(responses[0], step_hours)
+
+
+#---------------------bulk fetch for many locations---------------------
+
+# Open-Meteo takes comma separated latitude/longitude lists and answers with
+# one response per location, in order. Chunks keep the URL a sane length.
+BATCH_SIZE = int(os.getenv("OPEN_METEO_BATCH_SIZE", "50"))
+
+
+def _batch_params(coords):
+    params = _forecast_params(0, 0)
+    params["latitude"] = ",".join(f"{lat:g}" for lat, _ in coords)
+    params["longitude"] = ",".join(f"{lon:g}" for _, lon in coords)
+    return params
+
+
+def fetch_weather_batch(coords, batch_size: int = BATCH_SIZE):
+    """
+    Fetch forecasts for many (lat, lon) pairs with one request per chunk.
+
+    Returns a list of hourly (start, interval, {variable: array}, utc_offset)
+    in the order of `coords`.
+    """
+    coords = [(float(lat), float(lon)) for lat, lon in coords]
+    results = []
+    for i in range(0, len(coords), batch_size):
+        chunk = coords[i:i + batch_size]
+        responses = weather_api(_batch_params(chunk))
+        if len(responses) != len(chunk):
+            raise ValueError(f"Expected {len(chunk)} forecasts from Open-Meteo, got {len(responses)}.")
+        results.extend(_response_to_arrays(r) for r in responses)
+    return results
 
 
 #---------------------function to initialize weather cache---------------------
 
+# Forecasts of every city live in one columnar store (weather_store.py)
+# instead of one .cache/<city>.json file per city.
+#
+# Entries younger than CACHE_TTL are served as is. Up to CACHE_STALE_TTL the
+# stale entry is served immediately while one background refresh runs;
+# older (or missing) entries are refreshed before answering. Either way only
+# one refresh per grid cell is in flight at a time.
+CACHE_TTL = int(os.getenv("WEATHER_CACHE_TTL", "3600"))
+CACHE_STALE_TTL = int(os.getenv("WEATHER_CACHE_STALE_TTL", str(6 * 3600)))
+
+_refreshes = SingleFlight(max_workers=int(os.getenv("WEATHER_REFRESH_WORKERS", "4")))
+_geocodes = SingleFlight(max_workers=1)
+
+# Open-Meteo serves nearby points from the same model grid cell, so the
+# cache is keyed by coordinates snapped to this grid (degrees, ~11 km at
+# 0.1). "Bhopal", "bhopal city" and villages around it share one entry.
+GRID_RESOLUTION = float(os.getenv("WEATHER_GRID_RESOLUTION", "0.1"))
+
+
+def snap_to_grid(lat, lon, resolution: float = GRID_RESOLUTION):
+    """Snap coordinates to the centre of their forecast grid cell."""
+    return (round(round(float(lat) / resolution) * resolution, 4),
+            round(round(float(lon) / resolution) * resolution, 4))
+
+
+def cell_key(lat, lon):
+    """Store key of the grid cell containing (lat, lon)."""
+    lat, lon = snap_to_grid(lat, lon)
+    return f"{lat:g},{lon:g}"
+
+
+def _cell_coords(key):
+    lat, lon = key.split(",")
+    return float(lat), float(lon)
+
+
+def _resolve_cell(city_name: str):
+    """Place name -> grid cell key, via the alias table before any geocoding."""
+    store = get_weather_store()
+    alias = normalize(city_name)
+    key = store.alias(alias)
+    if key is None:
+        # concurrent first-time callers share one geocode (Nominatim fallback)
+        lat, lon = _geocodes.do(alias, get_lat_lon_from_city, city_name)
+        key = cell_key(lat, lon)
+    return alias, key
+
+
+def refresh_cell(key: str, name: str = None):
+    """Fetch the forecast of one grid cell and write it to the store."""
+    lat, lon = _cell_coords(key)
+    responses = weather_api(_forecast_params(lat, lon))
+    start, interval, columns, utc_offset = _response_to_arrays(responses[0])
+    get_weather_store().put(key, start, interval, columns, lat=lat, lon=lon, name=name, utc_offset=utc_offset)
+
 
 def init_weather_cache(city_name: str):
     """Initialize weather cache for given city."""
 
-    lat, lon = get_lat_lon_from_city(city_name)
-    data = fetch_weather_from_api(lat, lon)
+    alias, key = _resolve_cell(city_name)
+    _refreshes.do(key, refresh_cell, key, name=city_name.lower())
+    get_weather_store().set_alias(alias, key)
+
+
+def _log_refresh_error(future):
+    if future.exception() is not None:
+        print(f"BACKGROUND WEATHER REFRESH FAILED: {future.exception()}")
+
+
+def _ensure_fresh_cell(key: str, name: str = None):
+    """Refresh the forecast of grid cell `key` if it is missing or stale."""
+    entry = get_weather_store().entry(key)
+    age = time.time() - entry["timestamp"] if entry is not None else None
+
+    # Use cache if fresh
+    if age is not None and age < CACHE_TTL:
+        print("USING CACHED WEATHER DATA")
+        return key
+
+    # Serve slightly stale data now, refresh in the background
+    if age is not None and age < CACHE_STALE_TTL:
+        print("USING STALE WEATHER DATA, REFRESHING IN BACKGROUND")
+        _refreshes.do_background(key, refresh_cell, key, name=name).add_done_callback(_log_refresh_error)
+        return key
+
+    print("FETCHING NEW WEATHER DATA")
+    _refreshes.do(key, refresh_cell, key, name=name)
+    return key
+
+
+def _ensure_fresh(city_name: str):
+    """Return the store key for `city_name`, refreshing the forecast if missing or stale."""
+    alias, key = _resolve_cell(city_name)
+    _ensure_fresh_cell(key, name=city_name.lower())
+    get_weather_store().set_alias(alias, key)
+    return key
+
+
+def warm_weather_cache(places, force: bool = False, batch_size: int = BATCH_SIZE):
+    """
+    Fill the cache for many places using bulk Open-Meteo requests.
+
+    `places` may mix place names and (lat, lon) tuples. Places that fall in
+    the same grid cell are fetched once; cells that are still fresh are
+    skipped unless `force` is set. Names that can not be geocoded are listed
+    under "unresolved" instead of aborting the run.
+    """
+    store = get_weather_store()
+    cells, aliases, unresolved = {}, {}, []
+    for place in places:
+        if isinstance(place, str):
+            try:
+                alias, key = _resolve_cell(place)
+            except (ValueError, requests.RequestException) as e:
+                # unknown name or Nominatim down / timing out: skip it, keep warming the rest
+                unresolved.append(f"{place}: {e}")
+                continue
+            aliases[alias] = key
+            cells.setdefault(key, place.lower())
+        else:
+            cells.setdefault(cell_key(*place), None)
+
+    now = time.time()
+    stale = [key for key in cells
+             if force or (store.entry(key) or {}).get("timestamp", 0) < now - CACHE_TTL]
+
+    for i in range(0, len(stale), batch_size):
+        chunk = stale[i:i + batch_size]
+        forecasts = fetch_weather_batch([_cell_coords(k) for k in chunk], batch_size=batch_size)
+        store.put_many(
+            (key, start, interval, columns,
+             {"lat": _cell_coords(key)[0], "lon": _cell_coords(key)[1], "name": cells[key], "utc_offset": utc_offset})
+            for key, (start, interval, columns, utc_offset) in zip(chunk, forecasts)
+        )
+        print(f"WARMED {i + len(chunk)}/{len(stale)} WEATHER CELLS")
+
+    store.set_aliases(aliases)
+    return {"cells": len(cells), "fetched": len(stale), "fresh": len(cells) - len(stale), "unresolved": unresolved}
+
+
+def _parse_time(value, utc_offset: int):
+    """ISO date/time (local time unless it carries an offset) -> epoch seconds."""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        return int(ts.value // 10**9) - utc_offset
+    return int(ts.timestamp())
+
+
+def _read_aggregated(key: str, variables=None, step_hours: int = 3,
+                     start=None, end=None, next_hours: int = None):
+    """
+    Read cached hourly columns of `key` and aggregate them to `step_hours` windows.
 
-    CACHE_FILE = f".cache/{city_name.lower()}.json"
-    with open(CACHE_FILE, "w") as f:
-        json.dump({"city": city_name.lower(), "timestamp": time.time(), "data": data}, f)
+    `start` / `end` (ISO strings) or `next_hours` restrict the rows; the
+    columns are sliced as views of the store before anything is copied.
+    """
+    store = get_weather_store()
+    entry = store.entry(key)
+    utc_offset = entry.get("utc_offset", 0)
+    times = store.times(key)
+    columns = store.read(key, variables)
+
+    lo, hi = 0, len(times)
+    if next_hours is not None:
+        now = time.time()
+        start, end = now - entry["interval"], now + int(next_hours) * 3600
+        lo, hi = np.searchsorted(times, [start, end], side="right")
+    else:
+        if start is not None:
+            lo = np.searchsorted(times, _parse_time(start, utc_offset), side="right") - 1
+        if end is not None:
+            hi = np.searchsorted(times, _parse_time(end, utc_offset), side="right")
+    lo = max(int(lo), 0)
+
+    # keep windows on the clock grid (3-hourly at 00/03/.., daily at local midnight)
+    steps = max(1, step_hours * 3600 // entry["interval"])
+    lo -= lo % steps
+
+    times = times[lo:hi]
+    columns = {var: values[lo:hi] for var, values in columns.items()}
+    return _aggregated_json(times, columns, step_hours, entry["interval"], utc_offset)
+
+
+def get_weather_for_coords(lat: float, lon: float, step_hours: int = 3):
+    """Same output as `get_weather`, for raw coordinates (e.g. the user's GPS position)."""
+    key = _ensure_fresh_cell(cell_key(lat, lon))
+    return _read_aggregated(key, step_hours=step_hours)
 
 
 #---------------------function to get weather data---------------------
 
 
-def get_weather(city_name: str):
+def get_weather(city_name: str, step_hours: int = 3):
 
     """
     Fetches important weather variables from cache or Open-Meteo (if not available in cache) for a given location,
-    for the next 3 days (hourly data) — tailored for agricultural needs.
+    for the next 3 days (hourly data, aggregated to 3-hour windows by default) — tailored for agricultural needs.
 
     Parameters
     ----------
     city_name : str
         Name of the Indian city to fetch weather data for.
+    step_hours : int
+        Window size in hours: 1 (hourly), 3 (default), 6 or 24 (daily summary).
+        Rain and evapotranspiration are summed over each window, temperature is
+        reported as temperature_2m_max / temperature_2m_min, wind speed and rain
+        probability as the window maximum, the rest as the window mean.
 
     Returns
     -------
     dict
-        Hourly weather data in JSON format where:
+        Weather data in JSON format where:
 
     - temperature_2m (°C): Air temperature at 2 meters above ground — affects crop growth, pest activity, and heat stress.
     - relative_humidity_2m (%): Humidity at 2 meters above ground — influences disease risk (e.g., fungal infections) and crop transpiration.
@@ -180,42 +450,30 @@ def get_weather(city_name: str):
     - soil_moisture_1_to_3cm (m³/m³): Moisture in 1–3 cm soil layer — supports early root development.
     - soil_moisture_3_to_9cm (m³/m³): Moisture in 3–9 cm soil layer — reflects short-term water availability for most crops.
     - soil_moisture_9_to_27cm (m³/m³): Moisture in 9–27 cm soil layer — important for sustained crop water supply and drought resilience.
-    - wind_speed_10m (m/s): Wind speed at 10 meters — affects pollination, lodging risk, pesticide drift, and greenhouse ventilation.
+    - wind_speed_10m (km/h): Wind speed at 10 meters — affects pollination, lodging risk, pesticide drift, and greenhouse ventilation.
     """
 
     print('USING FULL WEATHER FORECAST')
 
-    #1st check city name in .cache
-    if os.path.exists(f".cache/{city_name.lower()}.json"):
-        with open(f".cache/{city_name.lower()}.json", "r") as f:
-            cache = json.load(f)
-        age = time.time() - cache["timestamp"]
-
-        # Use cache if same city and fresh
-        if cache["city"].lower() == city_name.lower() and age < 3600:
-            print("USING CACHED WEATHER DATA")
-            return cache["data"]
-
-    print("FETCHING NEW WEATHER DATA")
-    init_weather_cache(city_name)
-
-    with open(f".cache/{city_name.lower()}.json", "r") as f:
-        cache = json.load(f)
-    return cache["data"]
+    key = _ensure_fresh(city_name)
+    return _read_aggregated(key, step_hours=step_hours)
 
 #---------------------function to get weather data from particular variables---------------------
 
 
-def query_weather_variables(city_name: str, variable: str):
+def query_weather_variables(city_name: str, variables: list[str] | str, step_hours: int = 3,
+                            start: Optional[str] = None, end: Optional[str] = None,
+                            next_hours: Optional[int] = None):
     """
-    Query a specific weather variable for a given city.
+    Query one or more weather variables for a given city, optionally for a time window only.
     
     Parameters
     ----------
     city_name : str
         Name of the city (case-insensitive).
-    variable : str
-        Weather variable to fetch.
+    variables : list[str] | str
+        Weather variable(s) to fetch, e.g. ["precipitation", "wind_speed_10m"]
+        (a single name or a comma separated string also works).
 
         Available variables:
         - temperature_2m (°C): Air temperature at 2 meters above ground — affects crop growth, pest activity, and heat stress.
@@ -230,26 +488,41 @@ def query_weather_variables(city_name: str, variable: str):
         - soil_moisture_1_to_3cm (m³/m³): Moisture in 1–3 cm soil layer — supports early root development.
         - soil_moisture_3_to_9cm (m³/m³): Moisture in 3–9 cm soil layer — reflects short-term water availability for most crops.
         - soil_moisture_9_to_27cm (m³/m³): Moisture in 9–27 cm soil layer — important for sustained crop water supply and drought resilience.
-        - wind_speed_10m (m/s): Wind speed at 10 meters — affects pollination, lodging risk, pesticide drift, and greenhouse ventilation.
+        - wind_speed_10m (km/h): Wind speed at 10 meters — affects pollination, lodging risk, pesticide drift, and greenhouse ventilation.
+    step_hours : int
+        Window size in hours: 1, 3 (default), 6 or 24 (daily).
+    start, end : str, optional
+        Local date/time bounds, e.g. "2025-08-18" or "2025-08-18 06:00".
+    next_hours : int, optional
+        Only the next N hours from now (overrides start / end).
 
     Returns
     -------
     dict
         A dictionary with:
         - "date": list of ISO timestamps
-        - variable: list of values for the requested variable
+        - one list of values per requested variable
     """
 
-    data = get_weather(city_name)  # ensures cache refresh if stale
+    if isinstance(variables, str):
+        variables = [v.strip() for v in variables.split(",") if v.strip()]
+
+    key = _ensure_fresh(city_name)  # ensures cache refresh if stale
 
     print("USING VARIABLE QUERY!")
 
-    if variable not in data:
-        raise ValueError(f"Variable '{variable}' not found in weather data.")
-    return {
-            "date": data["date"],
-            variable: data[variable]
-        }
+    # only the requested columns are read from the store
+    bases = list(dict.fromkeys(base_variable(v) for v in variables))
+    data = _read_aggregated(key, bases, step_hours, start=start, end=end, next_hours=next_hours)
+
+    result = {"date": data["date"]}
+    for var in variables:
+        if var in data:
+            result[var] = data[var]
+        else:
+            # e.g. temperature_2m -> temperature_2m_max / temperature_2m_min
+            result.update({k: v for k, v in data.items() if base_variable(k) == var})
+    return result
 
 
 # def query_user_weather_data():